@@ -61,6 +61,7 @@ func take_damage(amount: int) -> void:
 	if health <= 0:
 		if get_tree().current_scene and get_tree().current_scene.has_method("add_score"):
 			get_tree().current_scene.add_score(1, reward_points)
+		EnemyRegistry.unregister(self)
 		queue_free()
 
 func _on_hitbox_body_entered(body: Node) -> void:
@@ -85,6 +86,7 @@ func activate(pos: Vector2, wave: int, tgt: Node2D) -> void:
 		body_shape.set_deferred("disabled", false)
 	if poly:
 		poly.visible = true
+	EnemyRegistry.register(self)
 
 # Visual hit feedback: floating numbers for boss
 func show_damage_feedback(amount: int, is_crit: bool, at: Vector2, custom_color: Color = Color(0,0,0,0), font_size: int = -1) -> void:
@@ -107,3 +109,6 @@ func show_damage_feedback(amount: int, is_crit: bool, at: Vector2, custom_color:
 	tw.tween_property(label, "position:y", label.position.y - 18.0, 0.30).set_trans(Tween.TRANS_SINE).set_ease(Tween.EASE_OUT)
 	tw.parallel().tween_property(label, "modulate:a", 0.0, 0.32)
 	tw.tween_callback(label.queue_free)
+
+func _exit_tree() -> void:
+	EnemyRegistry.unregister(self)
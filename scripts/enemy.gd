@@ -195,6 +195,7 @@ func activate(pos: Vector2, t: int, tgt: Node2D, p: Node) -> void:
 		body_shape.set_deferred("disabled", false)
 	if poly:
 		poly.visible = true
+	EnemyRegistry.register(self)
 
 func deactivate() -> void:
 	active = false
@@ -206,6 +207,7 @@ func deactivate() -> void:
 	if body_shape:
 		body_shape.set_deferred("disabled", true)
 	_reset_status_effects()
+	EnemyRegistry.unregister(self)
 
 func _return_to_pool() -> void:
 	if pool and pool.has_method("return_enemy"):
@@ -244,32 +246,28 @@ func apply_elemental_effect(effect: Dictionary, hit_damage: int, _hit_pos: Vecto
 			pass
 
 func _apply_shock_arcs(base_damage: int, count: int, radius: float, factor: float) -> void:
-	var enemies: Array = get_tree().get_nodes_in_group("enemies")
+	var enemies: Array[Node2D] = EnemyRegistry.query_radius(global_position, radius, self)
 	var hits := 0
 	for e in enemies:
 		if hits >= count:
 			break
-		if e == self or not is_instance_valid(e):
-			continue
-		if not e.is_visible_in_tree():
+		if not e.has_method("take_damage"):
 			continue
 		var pos: Vector2 = e.global_position
-		if global_position.distance_to(pos) <= radius:
-			if e.has_method("take_damage"):
-				var arc_base: int = int(round(float(base_damage) * factor))
-				var arc_dmg: int = arc_base
-				var is_crit := false
-				# Allow arcs to crit using the player's crit stats
-				var player = get_tree().get_first_node_in_group("player")
-				if player != null and player.has_method("compute_crit_result"):
-					var res: Dictionary = player.compute_crit_result(arc_base)
-					arc_dmg = int(res.get("damage", arc_base))
-					is_crit = bool(res.get("crit", false))
-				e.take_damage(arc_dmg)
-				if e.has_method("show_damage_feedback"):
-					e.show_damage_feedback(arc_dmg, is_crit, e.global_position)
-				hits += 1
-				_spawn_shock_arc(global_position, pos)
+		var arc_base: int = int(round(float(base_damage) * factor))
+		var arc_dmg: int = arc_base
+		var is_crit := false
+		# Allow arcs to crit using the player's crit stats
+		var player = get_tree().get_first_node_in_group("player")
+		if player != null and player.has_method("compute_crit_result"):
+			var res: Dictionary = player.compute_crit_result(arc_base)
+			arc_dmg = int(res.get("damage", arc_base))
+			is_crit = bool(res.get("crit", false))
+		e.take_damage(arc_dmg)
+		if e.has_method("show_damage_feedback"):
+			e.show_damage_feedback(arc_dmg, is_crit, e.global_position)
+		hits += 1
+		_spawn_shock_arc(global_position, pos)
 
 # Visual hit feedback: floating numbers + quick ring flash
 func show_damage_feedback(amount: int, is_crit: bool, at: Vector2, custom_color: Color = Color(0,0,0,0), font_size: int = -1) -> void:
@@ -0,0 +1,110 @@
+extends Node2D
+# Generated by tools/enemy_registry_codemod.py; edit the template there, not this file.
+# Headless benchmark: get_nodes_in_group("enemies") scans vs EnemyRegistry queries.
+# Run: godot4 --headless --path . res://scenes/EnemyQueryBench.tscn
+
+const SIZES: Array[int] = [100, 1000, 5000]
+const QUERIES: int = 200
+const ARENA: Vector2 = Vector2(1920.0, 1080.0)
+const RANGE: float = 400.0
+const RADIUS: float = 160.0
+
+func _ready() -> void:
+	seed(1234)
+	print("enemies  query           old_us/q   new_us/q   speedup")
+	for n in SIZES:
+		var spawned: Array[Node2D] = _spawn(n)
+		var probes: Array[Vector2] = []
+		for i in range(QUERIES):
+			probes.append(Vector2(randf() * ARENA.x, randf() * ARENA.y))
+		_report(n, "nearest", _time_old_nearest(probes, INF), _time_new_nearest(probes, INF))
+		_report(n, "nearest(range)", _time_old_nearest(probes, RANGE), _time_new_nearest(probes, RANGE))
+		_report(n, "query_radius", _time_old_radius(probes), _time_new_radius(probes))
+		_report(n, "active_count", _time_old_count(), _time_new_count())
+		for e in spawned:
+			EnemyRegistry.unregister(e)
+			e.free()
+	get_tree().quit()
+
+func _spawn(n: int) -> Array[Node2D]:
+	var out: Array[Node2D] = []
+	for i in range(n):
+		var e := Node2D.new()
+		add_child(e)
+		e.global_position = Vector2(randf() * ARENA.x, randf() * ARENA.y)
+		e.add_to_group("enemies")
+		EnemyRegistry.register(e)
+		out.append(e)
+	return out
+
+func _report(n: int, label: String, old_us: float, new_us: float) -> void:
+	var speedup: float = old_us / max(new_us, 0.001)
+	print("%7d  %-14s %9.2f  %9.2f  %7.1fx" % [n, label, old_us, new_us, speedup])
+
+# --- Old: linear group scans, as in the pre-registry call sites ---
+
+func _old_nearest(pos: Vector2, max_range: float) -> Node2D:
+	var enemies: Array = get_tree().get_nodes_in_group("enemies")
+	var nearest: Node2D = null
+	var min_d: float = max_range * max_range
+	for e in enemies:
+		if not is_instance_valid(e):
+			continue
+		var is_active := true
+		if e.has_method("get"):
+			var a: Variant = e.get("active")
+			if a != null:
+				is_active = bool(a)
+		if not is_active or not e.is_visible_in_tree():
+			continue
+		var d: float = pos.distance_squared_to(e.global_position)
+		if d < min_d:
+			min_d = d
+			nearest = e
+	return nearest
+
+func _time_old_nearest(probes: Array[Vector2], max_range: float) -> float:
+	var t0: int = Time.get_ticks_usec()
+	for p in probes:
+		_old_nearest(p, max_range)
+	return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_old_radius(probes: Array[Vector2]) -> float:
+	var t0: int = Time.get_ticks_usec()
+	for p in probes:
+		var hits: int = 0
+		for e in get_tree().get_nodes_in_group("enemies"):
+			if not is_instance_valid(e) or not e.is_visible_in_tree():
+				continue
+			if p.distance_to(e.global_position) <= RADIUS:
+				hits += 1
+	return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_old_count() -> float:
+	var t0: int = Time.get_ticks_usec()
+	for i in range(QUERIES):
+		var total: int = 0
+		for e in get_tree().get_nodes_in_group("enemies"):
+			if is_instance_valid(e):
+				total += 1
+	return float(Time.get_ticks_usec() - t0) / float(QUERIES)
+
+# --- New: EnemyRegistry ---
+
+func _time_new_nearest(probes: Array[Vector2], max_range: float) -> float:
+	var t0: int = Time.get_ticks_usec()
+	for p in probes:
+		EnemyRegistry.nearest(p, max_range)
+	return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_new_radius(probes: Array[Vector2]) -> float:
+	var t0: int = Time.get_ticks_usec()
+	for p in probes:
+		EnemyRegistry.query_radius(p, RADIUS)
+	return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_new_count() -> float:
+	var t0: int = Time.get_ticks_usec()
+	for i in range(QUERIES):
+		EnemyRegistry.active_count()
+	return float(Time.get_ticks_usec() - t0) / float(QUERIES)
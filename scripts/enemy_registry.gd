@@ -0,0 +1,196 @@
+extends Node
+# Generated by tools/enemy_registry_codemod.py; edit the template there, not this file.
+# Autoload "EnemyRegistry": uniform-grid spatial hash of active enemies.
+# Enemies register in activate() and unregister in deactivate(); freed or
+# deactivated nodes are pruned by _rebucket() and active_count(). Positions are
+# re-bucketed once per physics frame, so shooters pay for the cells they touch
+# instead of a full get_nodes_in_group("enemies") scan.
+
+const CELL_SIZE: float = 128.0
+# Extra ring of cells scanned by query_radius(): an enemy can have crossed at most
+# one cell boundary since the last _rebucket().
+const STALE_CELLS: int = 1
+
+var _enemies: Dictionary = {}   # instance_id -> Node2D
+var _cell_of: Dictionary = {}   # instance_id -> Vector2i
+var _cells: Dictionary = {}     # Vector2i -> Array[int] (instance ids)
+var _min_cell: Vector2i = Vector2i.ZERO
+var _max_cell: Vector2i = Vector2i.ZERO
+
+# Scratch state for nearest() so the ring scan does not allocate.
+var _q_best: Node2D = null
+var _q_best_d2: float = INF
+
+func _ready() -> void:
+	# Re-bucket before enemies move and shooters query in the same frame.
+	process_physics_priority = -100
+
+func _physics_process(_delta: float) -> void:
+	_rebucket()
+
+func register(e: Node2D) -> void:
+	if e == null:
+		return
+	var id: int = e.get_instance_id()
+	if _enemies.has(id):
+		return
+	_enemies[id] = e
+	var c: Vector2i = _cell_for(e.global_position)
+	_insert(id, c)
+	if _enemies.size() == 1:
+		_min_cell = c
+		_max_cell = c
+	else:
+		_grow_bounds(c)
+
+func unregister(e: Node2D) -> void:
+	if e == null:
+		return
+	_remove(e.get_instance_id())
+
+# Prunes freed and deactivated entries first, so the count never lags a frame.
+func active_count() -> int:
+	for id in _enemies.keys():
+		if not _is_live(_enemies[id]):
+			_remove(id)
+	return _enemies.size()
+
+# Nearest usable enemy to pos within max_range (INF = anywhere), or null.
+func nearest(pos: Vector2, max_range: float = INF) -> Node2D:
+	if _enemies.is_empty():
+		return null
+	_q_best = null
+	_q_best_d2 = max_range * max_range
+	var center: Vector2i = _cell_for(pos)
+	# Never walk past the occupied bounds; a finite range can stop sooner.
+	var max_ring: int = max(
+		max(abs(center.x - _min_cell.x), abs(_max_cell.x - center.x)),
+		max(abs(center.y - _min_cell.y), abs(_max_cell.y - center.y)))
+	if not is_inf(max_range):
+		max_ring = min(max_ring, int(ceil(max_range / CELL_SIZE)))
+	for ring in range(max_ring + 1):
+		# Everything in this ring is at least (ring - 1) cells away.
+		if _q_best != null and ring > 1:
+			var ring_min: float = float(ring - 1) * CELL_SIZE
+			if ring_min * ring_min > _q_best_d2:
+				break
+		if ring == 0:
+			_scan_cell(center, pos)
+			continue
+		for dx in range(-ring, ring + 1):
+			_scan_cell(Vector2i(center.x + dx, center.y - ring), pos)
+			_scan_cell(Vector2i(center.x + dx, center.y + ring), pos)
+		for dy in range(-ring + 1, ring):
+			_scan_cell(Vector2i(center.x - ring, center.y + dy), pos)
+			_scan_cell(Vector2i(center.x + ring, center.y + dy), pos)
+	var found: Node2D = _q_best
+	_q_best = null
+	return found
+
+# All usable enemies within r of pos (unordered). Safe to damage/kill while iterating.
+# Buckets can be one physics tick old, so the scan is padded by STALE_CELLS and
+# every hit is tested against the enemy's current position.
+func query_radius(pos: Vector2, r: float, exclude: Node = null) -> Array[Node2D]:
+	var out: Array[Node2D] = []
+	if _enemies.is_empty() or r < 0.0:
+		return out
+	var r2: float = r * r
+	var lo: Vector2i = _cell_for(pos - Vector2(r, r)) - Vector2i(STALE_CELLS, STALE_CELLS)
+	var hi: Vector2i = _cell_for(pos + Vector2(r, r)) + Vector2i(STALE_CELLS, STALE_CELLS)
+	lo = Vector2i(max(lo.x, _min_cell.x), max(lo.y, _min_cell.y))
+	hi = Vector2i(min(hi.x, _max_cell.x), min(hi.y, _max_cell.y))
+	for cx in range(lo.x, hi.x + 1):
+		for cy in range(lo.y, hi.y + 1):
+			var bucket: Variant = _cells.get(Vector2i(cx, cy))
+			if bucket == null:
+				continue
+			for id in bucket:
+				var e: Node2D = _usable(id)
+				if e == null or e == exclude:
+					continue
+				if pos.distance_squared_to(e.global_position) <= r2:
+					out.append(e)
+	return out
+
+func _scan_cell(c: Vector2i, pos: Vector2) -> void:
+	var bucket: Variant = _cells.get(c)
+	if bucket == null:
+		return
+	for id in bucket:
+		var e: Node2D = _usable(id)
+		if e == null:
+			continue
+		var d2: float = pos.distance_squared_to(e.global_position)
+		if d2 < _q_best_d2:
+			_q_best_d2 = d2
+			_q_best = e
+
+func _usable(id: int) -> Node2D:
+	var e: Variant = _enemies.get(id)
+	if not _is_live(e):
+		return null
+	var n: Node2D = e
+	if not n.is_visible_in_tree():
+		return null
+	return n
+
+# Valid and not deactivated (pooled enemies expose an "active" flag).
+func _is_live(e: Variant) -> bool:
+	if e == null or not is_instance_valid(e):
+		return false
+	var a: Variant = e.get("active")
+	return a == null or bool(a)
+
+func _cell_for(p: Vector2) -> Vector2i:
+	return Vector2i(int(floor(p.x / CELL_SIZE)), int(floor(p.y / CELL_SIZE)))
+
+func _insert(id: int, c: Vector2i) -> void:
+	var bucket: Variant = _cells.get(c)
+	if bucket == null:
+		var fresh: Array[int] = [id]
+		_cells[c] = fresh
+	else:
+		bucket.append(id)
+	_cell_of[id] = c
+
+func _remove(id: int) -> void:
+	if not _enemies.has(id):
+		return
+	_enemies.erase(id)
+	var c: Variant = _cell_of.get(id)
+	_cell_of.erase(id)
+	if c == null:
+		return
+	var bucket: Variant = _cells.get(c)
+	if bucket == null:
+		return
+	bucket.erase(id)
+	if bucket.is_empty():
+		_cells.erase(c)
+
+func _grow_bounds(c: Vector2i) -> void:
+	_min_cell = Vector2i(min(_min_cell.x, c.x), min(_min_cell.y, c.y))
+	_max_cell = Vector2i(max(_max_cell.x, c.x), max(_max_cell.y, c.y))
+
+func _rebucket() -> void:
+	var first := true
+	for id in _enemies.keys():
+		var e: Variant = _enemies[id]
+		if not _is_live(e):
+			_remove(id)
+			continue
+		var c: Vector2i = _cell_for(e.global_position)
+		var old: Vector2i = _cell_of.get(id, c)
+		if old != c:
+			var bucket: Variant = _cells.get(old)
+			if bucket != null:
+				bucket.erase(id)
+				if bucket.is_empty():
+					_cells.erase(old)
+			_insert(id, c)
+		if first:
+			_min_cell = c
+			_max_cell = c
+			first = false
+		else:
+			_grow_bounds(c)
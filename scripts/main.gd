@@ -283,18 +283,7 @@ func _ui_modal_active() -> bool:
 
 
 func _active_enemies_count() -> int:
-	var total := 0
-	for e in get_tree().get_nodes_in_group("enemies"):
-		if not is_instance_valid(e):
-			continue
-		var is_active := true
-		if e.has_method("get"):
-			var a = e.get("active")
-			if a != null:
-				is_active = bool(a)
-		if is_active:
-			total += 1
-	return total
+	return EnemyRegistry.active_count()
 
 func _spawn_enemies() -> void:
 	# Stronger quantity curve
@@ -153,25 +153,7 @@ func _physics_process(delta: float) -> void:
 		_update_weapons_fire(delta, target.global_position)
 
 func _get_nearest_enemy() -> Node2D:
-	var enemies: Array = get_tree().get_nodes_in_group("enemies")
-	var nearest: Node2D = null
-	var min_d: float = INF
-	for e in enemies:
-		if not is_instance_valid(e):
-			continue
-		# Skip pooled/inactive or hidden enemies
-		var is_active := true
-		if e.has_method("get"):
-			var a = e.get("active")
-			if a != null:
-				is_active = bool(a)
-		if not is_active or not e.is_visible_in_tree():
-			continue
-		var d: float = global_position.distance_squared_to(e.global_position)
-		if d < min_d:
-			min_d = d
-			nearest = e
-	return nearest
+	return EnemyRegistry.nearest(global_position)
 
 func _ensure_default_input_actions() -> void:
 	var defaults: Dictionary = {
@@ -513,18 +495,9 @@ func _emit_hemorrhage_shockwave(damage: int) -> void:
 	if damage <= 0:
 		return
 	var radius: float = hemorrhage_shockwave_radius if hemorrhage_shockwave_radius > 0.0 else HEMORRHAGE_SHOCKWAVE_BASE_RADIUS
-	var enemies := get_tree().get_nodes_in_group("enemies")
-	for e in enemies:
-		if e == null or not is_instance_valid(e):
-			continue
-		var enemy := e as Node2D
-		if enemy == null:
-			continue
+	for enemy in EnemyRegistry.query_radius(global_position, radius):
 		if not enemy.has_method("take_damage"):
 			continue
-		var dist: float = enemy.global_position.distance_to(global_position)
-		if dist > radius:
-			continue
 		enemy.set("last_damage_source", {"kind":"item", "item_id":"hemorrhage_engine"})
 		enemy.call("take_damage", damage)
 	_spawn_hemorrhage_shockwave_visual(radius)
@@ -113,24 +113,7 @@ func _physics_process(delta: float) -> void:
 			_cd = max(MIN_TURRET_INTERVAL, fire_interval)
 
 func _get_nearest_enemy_in_range() -> Node2D:
-	var enemies: Array = get_tree().get_nodes_in_group("enemies")
-	var nearest: Node2D = null
-	var min_d: float = attack_range * attack_range
-	for e in enemies:
-		if not is_instance_valid(e):
-			continue
-		var is_active := true
-		if e.has_method("get"):
-			var a = e.get("active")
-			if a != null:
-				is_active = bool(a)
-		if not is_active or not e.is_visible_in_tree():
-			continue
-		var d: float = global_position.distance_squared_to(e.global_position)
-		if d < min_d:
-			min_d = d
-			nearest = e
-	return nearest
+	return EnemyRegistry.nearest(global_position, attack_range)
 
 func _shoot(pos: Vector2) -> void:
 	if turret_role == "healing":
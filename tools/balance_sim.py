@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+"""
+balance_sim.py
+
+Monte Carlo wave/economy balance simulator driven by the game's own formulas.
+
+Key points:
+- Reads the tuning straight from the scripts (no copy of the numbers lives here):
+  main.gd  _difficulty_params(), _cap_scale_for_wave(), _tier_for_wave(),
+           _xp_for_next_level(), _compute_wave_duration(), spawn cadence and the
+           soft/hard-cap group spawning in _spawn_enemies_grouped()/_adjust_spawning();
+  shop.gd  offer costs, weapon tier rolls and the per-wave price multiplier;
+  enemy.gd / boss.gd  per-tier HP/damage and reward_points.
+  If a formula no longer matches the expected shape, extraction fails loudly
+  instead of silently simulating stale numbers.
+- Simulates thousands of seeded runs at once with NumPy: all runs of all selected
+  difficulties are stacked into one batch and stepped spawn-event by spawn-event
+  (enemy caps, group sizes, gaps, tiers), with XP/level-ups, currency and shop
+  purchases resolved at each intermission.
+- The player is abstracted as a damage throughput (--dps) that grows with level
+  and purchases; kills use the average HP of the live enemy pool. Those knobs are
+  the only assumptions; everything else is extracted.
+- Writes one percentile table per difficulty (CSV, one row per wave) plus a JSON
+  summary tagged with the git commit.
+- '--self-test' checks the extracted formulas against hand-computed values for the
+  current tuning and the vectorized tables against the scalar reference. Update
+  HAND_VALUES when retuning on purpose.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_source import (  # noqa: E402
+    CONST_NUM,
+    DICT_NUM,
+    DIFFICULTIES,
+    DIFFICULTY_ENUM,
+    DIFFICULTY_RETURN,
+    SourceError,
+    function_body,
+    gd_round,
+    git_head,
+)
+from tscn_format import find_project_root  # noqa: E402
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - reported by main()
+    np = None  # type: ignore[assignment]
+
+# --------------------------- Formula patterns --------------------------------
+
+NUM = r"-?\d+(?:\.\d+)?"
+
+# (script, function or None for top level, pattern). Every named group becomes a
+# model parameter; a pattern that stops matching is a hard error.
+FORMULAS: List[Tuple[str, Optional[str], str]] = [
+    ("main.gd", "_cap_scale_for_wave",
+     r"min\(\s*(?P<cap_scale_max>NUM)\s*,\s*(?P<cap_scale_base>NUM)\s*\+\s*(?P<cap_scale_step>NUM)\s*\*"),
+    ("main.gd", "_tier_for_wave",
+     r"var base := (?P<tier_base>\d+)\s*\+\s*int\(floor\(max\(0\.0,\s*float\(w - 1\)\)\s*/\s*(?P<tier_step>NUM)\)\)"
+     r".*?if w >= (?P<tier_ramp_start>\d+):.*?float\(w - (?P<tier_ramp_offset>\d+)\)\s*/\s*(?P<tier_ramp_step>NUM)"),
+    ("main.gd", "_xp_for_next_level",
+     r"var need := (?P<xp_a>NUM)\s*\+\s*(?P<xp_b>NUM)\s*\*\s*lf\s*\+\s*(?P<xp_c>NUM)\s*\*\s*lf\s*\*\s*lf"
+     r".*?max\(\s*(?P<xp_min>\d+)\s*,\s*int\(round\(need\)\)\)"),
+    ("main.gd", "_compute_wave_duration",
+     r"(?P<dur_base>NUM)\s*\+\s*(?P<dur_step>NUM)\s*\*\s*float\(max\(0, wave_index - 1\)\)"
+     r".*?base_cap: float = (?P<dur_cap>NUM)"
+     r".*?if wave_index > (?P<dur_cap_after>\d+):.*?/\s*(?P<dur_cap_every>NUM)\)"
+     r".*?base_cap \+ (?P<dur_cap_bonus>NUM)\s*\*"),
+    ("main.gd", "_start_next_wave",
+     r"max\(\s*(?P<wait_min>NUM)\s*,\s*(?P<wait_base>NUM)\s*-\s*float\(wave\)\s*\*\s*(?P<wait_step>NUM)\)"
+     r".*?clamp\(base_wait \* cadence_mult,\s*(?P<wait_clamp_lo>NUM)\s*,\s*(?P<wait_clamp_hi>NUM)\)"
+     r".*?if wave % (?P<boss_every>\d+) == 0:"),
+    ("main.gd", "_spawn_enemies_grouped",
+     r"var base_count := (?P<count_base>\d+)\s*\+\s*int\(round\(float\(wave\)\s*\*\s*(?P<count_step>NUM)\)\)"
+     r".*?count = max\(1, int\(round\(float\(base_count\)\s*\*\s*(?P<over_count_frac>NUM)\)\)\)"
+     r".*?tier \+= min\((?P<over_tier_max>\d+), int\(floor\(float\(over\)\s*/\s*(?P<over_tier_every>NUM)\)\) \+ 1\)"
+     r".*?spawn_timer\.wait_time = min\((?P<backoff_max>NUM), spawn_timer\.wait_time \* (?P<backoff_mult>NUM)\)"
+     r".*?var gmin := (?P<group_min>\d+)"
+     r".*?clamp\(floor\(float\(wave\)\s*/\s*(?P<group_wave_every>NUM)\), 0, (?P<group_wave_max>\d+)\)"
+     r".*?min\(GROUP_GAP_MAX \+ (?P<gap_over_add>NUM), gap \* (?P<gap_over_mult>NUM)\)"
+     r".*?max\(LOW_ENEMY_MIN_GAP, gap \* (?P<gap_low_mult>NUM)\)"
+     r".*?max\(GROUP_GAP_MIN \* (?P<gap_norm_floor>NUM), gap \* (?P<gap_norm_mult>NUM)\)"),
+    ("main.gd", "_adjust_spawning",
+     r"if enemies > soft_cap:\s*spawn_timer\.wait_time = min\((?P<adjust_over_max>NUM), spawn_timer\.wait_time \* "
+     r"(?P<adjust_over_mult>NUM)\)"),
+    ("main.gd", "_generate_shop_offers", r"generate_offers\((?P<offer_count>\d+), wave\)"),
+    ("shop.gd", "generate_offers",
+     r"pow\((?P<tier_cost_mult>NUM), float\(t - 1\)\).*?pow\((?P<price_wave_mult>NUM), float\(max\(0, wave - 1\)\)\)"),
+    ("enemy.gd", "_apply_tier",
+     r"var base_hp: int = (?P<enemy_hp>\d+).*?var base_dmg: int = (?P<enemy_dmg>\d+)"
+     r".*?hp = int\(round\(hp \* (?P<enemy_hp_mult>NUM)\)\).*?dmg = int\(round\(dmg \* (?P<enemy_dmg_mult>NUM)\)\)"
+     r".*?float\(max_health\) / (?P<enemy_hp_div>NUM).*?float\(contact_damage\) / (?P<enemy_dmg_div>NUM)"
+     r".*?max\((?P<enemy_reward_min>\d+), int\(round\(hp_factor \* (?P<enemy_reward_hp>NUM) \+ dmg_factor \* "
+     r"(?P<enemy_reward_dmg>NUM)\)\)\)"),
+    ("boss.gd", None,
+     r"var base_max_health: int = (?P<boss_hp>\d+).*?var base_contact_damage: int = (?P<boss_dmg>\d+)"),
+    ("boss.gd", "_apply_wave_scaling",
+     r"float\(w - 1\) / (?P<boss_wave_div>NUM).*?pow\((?P<boss_hp_mult>NUM), w_scale\)"
+     r".*?\(1\.0 \+ (?P<boss_dmg_step>NUM) \* w_scale\)"
+     r".*?float\(base_max_health\) / (?P<boss_hp_div>NUM).*?float\(base_contact_damage\) / (?P<boss_dmg_div>NUM)"
+     r".*?max\((?P<boss_reward_min>\d+), int\(round\(hp_factor \* (?P<boss_reward_hp>NUM) \+ dmg_factor \* "
+     r"(?P<boss_reward_dmg>NUM)\)\)\)"),
+]
+
+MAIN_CONSTS: Tuple[str, ...] = (
+    "SOFT_CAP_ENEMIES", "MAX_ENEMIES", "GROUP_GAP_MIN", "GROUP_GAP_MAX",
+    "LOW_ENEMY_FRACTION", "LOW_ENEMY_BOOST", "VERY_LOW_ENEMIES", "VERY_LOW_BOOST", "LOW_ENEMY_MIN_GAP",
+)
+
+TIER_ROLL = re.compile(
+    r"var p(?P<tier>\d)\s*:\s*float\s*=\s*min\((?P<base>NUM)\s*\+\s*(?P<step>NUM)\s*\*\s*float\(w - 1\),\s*(?P<cap>NUM)\)"
+    .replace("NUM", NUM)
+)
+SHOP_ENTRY = re.compile(r'\{"kind"\s*:\s*"(?P<kind>\w+)".*?"cost"\s*:\s*(?P<cost>\d+)')
+
+DIFFICULTY_KEYS: Tuple[str, ...] = ("count_mult", "cadence_mult", "tier_bonus", "cap_mult", "group_max")
+
+# Hand-computed from the current scripts: (formula, args, expected).
+HAND_VALUES: List[Tuple[str, Tuple, float]] = [
+    ("xp_for_next_level", (1,), 15),
+    ("xp_for_next_level", (2,), 34),
+    ("xp_for_next_level", (5,), 151),
+    ("xp_for_next_level", (10,), 546),
+    ("wave_duration", (1,), 20.0),
+    ("wave_duration", (5,), 40.0),
+    ("wave_duration", (15,), 90.0),
+    ("wave_duration", (25,), 90.0),
+    ("wave_duration", (30,), 100.0),
+    ("wave_duration", (40,), 110.0),
+    ("cap_scale", (1,), 1.0),
+    ("cap_scale", (10,), 2.62),
+    ("cap_scale", (30,), 5.0),
+    ("soft_cap", ("Normal", 10), 52),
+    ("hard_cap", ("Normal", 10), 105),
+    ("soft_cap", ("Easy", 1), 17),
+    ("hard_cap", ("Easy", 1), 34),
+    ("tier_for_wave", ("Normal", 1), 1),
+    ("tier_for_wave", ("Normal", 3), 2),
+    ("tier_for_wave", ("Normal", 6), 3),
+    ("tier_for_wave", ("Normal", 7), 4),
+    ("tier_for_wave", ("Normal", 8), 5),
+    ("tier_for_wave", ("Normal", 10), 7),
+    ("tier_for_wave", ("Easy", 1), 1),
+    ("tier_for_wave", ("Insane", 1), 3),
+    ("spawn_count", ("Normal", 1), 5),
+    ("spawn_count", ("Easy", 1), 4),
+    ("first_wait", ("Normal", 1), 0.7),
+    ("first_wait", ("Easy", 1), 0.805),
+    ("first_wait", ("Normal", 8), 0.1),
+    ("enemy_stats", (1,), (20, 10, 1)),
+    ("enemy_stats", (2,), (31, 13, 2)),
+    ("enemy_stats", (3,), (48, 16, 2)),
+    ("enemy_stats", (4,), (74, 20, 3)),
+    ("boss_stats", (5,), (381, 27, 18)),
+    ("offer_price", (10, 1, 1), 10),
+    ("offer_price", (10, 1, 3), 34),
+    ("offer_price", (10, 2, 1), 12),
+    ("offer_price", (14, 3, 2), 37),
+]
+
+PERCENTILES: Tuple[int, ...] = (5, 25, 50, 75, 95)
+
+# --------------------------- Extraction --------------------------------------
+
+class ModelError(SourceError):
+    pass
+
+def _read_script(root: str, name: str) -> str:
+    fp = os.path.join(root, "scripts", name)
+    try:
+        with open(fp, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError as e:
+        raise ModelError(f"cannot read {fp}: {e}") from e
+
+def extract_model(root: str) -> Dict:
+    """All tuning the simulator needs, read from scripts/*.gd under the project root."""
+    texts = {name: _read_script(root, name) for name in ("main.gd", "shop.gd", "enemy.gd", "boss.gd")}
+    params: Dict[str, float] = {}
+    for script, func, pattern in FORMULAS:
+        src = texts[script] if func is None else function_body(texts[script], func)
+        m = re.search(pattern.replace("NUM", NUM), src, re.S)
+        if not m:
+            where = f"{script}:{func}()" if func else script
+            raise ModelError(f"{where} no longer matches the simulated formula; update tools/balance_sim.py")
+        params.update({k: float(v) for k, v in m.groupdict().items()})
+
+    for ln in texts["main.gd"].splitlines():
+        m = CONST_NUM.match(ln)
+        if m and m.group("name") in MAIN_CONSTS:
+            params.setdefault(m.group("name"), float(m.group("value")))
+    missing = [c for c in MAIN_CONSTS if c not in params]
+    if missing:
+        raise ModelError(f"main.gd is missing consts: {', '.join(missing)}")
+
+    body = function_body(texts["main.gd"], "_difficulty_params")
+    cases: Dict[str, Dict[str, float]] = {}
+    fallback: Optional[Dict[str, float]] = None
+    for m in DIFFICULTY_RETURN.finditer(body):
+        values = {d.group("key"): float(d.group("value")) for d in DICT_NUM.finditer(m.group("body"))}
+        if m.group("default"):
+            fallback = values
+        else:
+            cases[m.group("name")] = values
+    em = DIFFICULTY_ENUM.search(texts["main.gd"])
+    names = re.findall(r'"(\w+)"', em.group("names")) if em else list(DIFFICULTIES)
+    difficulties: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        values = cases.get(name, fallback)
+        if values is None or any(k not in values for k in DIFFICULTY_KEYS):
+            raise ModelError(f"_difficulty_params() has no complete entry for {name}")
+        difficulties[name] = {k: values[k] for k in DIFFICULTY_KEYS}
+
+    roll = function_body(texts["shop.gd"], "_roll_weapon_tier")
+    tier_roll = sorted(((int(m.group("tier")), float(m.group("base")), float(m.group("step")), float(m.group("cap")))
+                        for m in TIER_ROLL.finditer(roll)), reverse=True)
+    if not tier_roll:
+        raise ModelError("shop.gd:_roll_weapon_tier() no longer matches the simulated formula")
+
+    # generate_offers() samples from WEAPONS + ITEMS, the only catalog entries with a "cost".
+    offers = [(m.group("kind"), int(m.group("cost"))) for m in SHOP_ENTRY.finditer(texts["shop.gd"])]
+    if not offers:
+        raise ModelError("shop.gd has no catalog entries with a cost")
+
+    return {"params": params, "difficulties": difficulties, "tier_roll": tier_roll, "offers": offers}
+
+# --------------------------- Scalar reference --------------------------------
+# One function per GDScript formula, written to mirror the script line by line.
+# The vectorized simulator builds its lookup tables from these.
+
+def cap_scale(model: Dict, w: int) -> float:
+    p = model["params"]
+    return min(p["cap_scale_max"], p["cap_scale_base"] + p["cap_scale_step"] * float(max(0, w - 1)))
+
+def soft_cap(model: Dict, difficulty: str, w: int) -> int:
+    cap_mult = model["difficulties"][difficulty]["cap_mult"]
+    return gd_round(model["params"]["SOFT_CAP_ENEMIES"] * cap_mult * cap_scale(model, w))
+
+def hard_cap(model: Dict, difficulty: str, w: int) -> int:
+    cap_mult = model["difficulties"][difficulty]["cap_mult"]
+    return gd_round(model["params"]["MAX_ENEMIES"] * cap_mult * cap_scale(model, w))
+
+def tier_for_wave(model: Dict, difficulty: str, w: int) -> int:
+    p = model["params"]
+    base = int(p["tier_base"]) + int(math.floor(max(0.0, float(w - 1)) / p["tier_step"]))
+    if w >= p["tier_ramp_start"]:
+        base += int(math.floor(float(w - p["tier_ramp_offset"]) / p["tier_ramp_step"]))
+    base += int(model["difficulties"][difficulty]["tier_bonus"])
+    return max(1, base)
+
+def xp_for_next_level(model: Dict, level: int) -> int:
+    p = model["params"]
+    lf = float(max(1, level))
+    return max(int(p["xp_min"]), gd_round(p["xp_a"] + p["xp_b"] * lf + p["xp_c"] * lf * lf))
+
+def wave_duration(model: Dict, w: int) -> float:
+    p = model["params"]
+    wave_index = max(1, w)
+    base = p["dur_base"] + p["dur_step"] * float(max(0, wave_index - 1))
+    steps = 0
+    if wave_index > p["dur_cap_after"]:
+        steps = int(math.floor(float(wave_index - p["dur_cap_after"]) / p["dur_cap_every"]))
+    return min(p["dur_cap"] + p["dur_cap_bonus"] * float(steps), base)
+
+def first_wait(model: Dict, difficulty: str, w: int) -> float:
+    p = model["params"]
+    base_wait = max(p["wait_min"], p["wait_base"] - float(w) * p["wait_step"])
+    cadence = model["difficulties"][difficulty]["cadence_mult"]
+    return min(p["wait_clamp_hi"], max(p["wait_clamp_lo"], base_wait * cadence))
+
+def base_count(model: Dict, w: int) -> int:
+    p = model["params"]
+    return int(p["count_base"]) + gd_round(float(w) * p["count_step"])
+
+def spawn_count(model: Dict, difficulty: str, w: int) -> int:
+    """Group budget before the low-density boost and the caps."""
+    return gd_round(float(base_count(model, w)) * model["difficulties"][difficulty]["count_mult"])
+
+def enemy_stats(model: Dict, tier: int) -> Tuple[int, int, int]:
+    """(max_health, contact_damage, reward_points) for a regular enemy of 'tier'."""
+    p = model["params"]
+    hp, dmg = int(p["enemy_hp"]), int(p["enemy_dmg"])
+    for _ in range(2, max(1, tier) + 1):
+        hp = gd_round(hp * p["enemy_hp_mult"])
+        dmg = gd_round(dmg * p["enemy_dmg_mult"])
+    reward = gd_round(hp / p["enemy_hp_div"] * p["enemy_reward_hp"] + dmg / p["enemy_dmg_div"] * p["enemy_reward_dmg"])
+    return hp, dmg, max(int(p["enemy_reward_min"]), reward)
+
+def boss_stats(model: Dict, w: int) -> Tuple[int, int, int]:
+    """(max_health, contact_damage, reward_points) for the boss spawned on wave 'w'."""
+    p = model["params"]
+    w_scale = float(max(1, w) - 1) / p["boss_wave_div"]
+    hp = max(1, gd_round(p["boss_hp"] * math.pow(p["boss_hp_mult"], w_scale)))
+    dmg = max(1, gd_round(p["boss_dmg"] * (1.0 + p["boss_dmg_step"] * w_scale)))
+    reward = gd_round(hp / p["boss_hp_div"] * p["boss_reward_hp"] + dmg / p["boss_dmg_div"] * p["boss_reward_dmg"])
+    return hp, dmg, max(int(p["boss_reward_min"]), reward)
+
+def offer_price(model: Dict, cost: int, tier: int, wave: int) -> int:
+    p = model["params"]
+    if tier > 1:
+        cost = gd_round(cost * math.pow(p["tier_cost_mult"], float(tier - 1)))
+    return max(1, gd_round(float(cost) * math.pow(p["price_wave_mult"], float(max(0, wave - 1)))))
+
+def tier_probabilities(model: Dict, wave: int) -> List[Tuple[int, float]]:
+    """[(tier, p)] in roll order (highest first); the remainder rolls tier 1."""
+    w = max(1, wave)
+    return [(t, min(base + step * float(w - 1), cap)) for t, base, step, cap in model["tier_roll"]]
+
+# --------------------------- Vectorized simulation ---------------------------
+
+def _round_np(x):
+    # GDScript round(): half away from zero.
+    return np.where(x >= 0, np.floor(x + 0.5), -np.floor(-x + 0.5))
+
+def xp_need_np(model: Dict, level):
+    p = model["params"]
+    lf = np.maximum(1, level).astype(np.float64)
+    return np.maximum(p["xp_min"], _round_np(p["xp_a"] + p["xp_b"] * lf + p["xp_c"] * lf * lf)).astype(np.int64)
+
+def _tier_table(model: Dict, max_tier: int):
+    stats = [enemy_stats(model, t) for t in range(max_tier + 1)]
+    hp = np.array([s[0] for s in stats], dtype=np.float64)
+    reward = np.array([s[2] for s in stats], dtype=np.float64)
+    return hp, reward
+
+def simulate(model: Dict, difficulties: Sequence[str], runs: int, waves: int, seed: int,
+             dps: float, dps_sigma: float, level_gain: float, buy_gain: float) -> Dict[str, Dict[str, "np.ndarray"]]:
+    """Per-difficulty metrics, each an array of shape (runs, waves)."""
+    p = model["params"]
+    rng = np.random.default_rng(seed)
+    n_diff = len(difficulties)
+    rows = n_diff * runs
+    diff_idx = np.repeat(np.arange(n_diff), runs)
+
+    def per_row(key: str):
+        return np.array([model["difficulties"][d][key] for d in difficulties], dtype=np.float64)[diff_idx]
+
+    count_mult, group_max = per_row("count_mult"), per_row("group_max")
+
+    # Per (difficulty, wave) schedules from the scalar reference.
+    def schedule(fn):
+        return np.array([[fn(d, w) for w in range(1, waves + 1)] for d in difficulties], dtype=np.float64)[diff_idx]
+
+    soft = schedule(lambda d, w: soft_cap(model, d, w))
+    hard = schedule(lambda d, w: hard_cap(model, d, w))
+    tier = schedule(lambda d, w: tier_for_wave(model, d, w)).astype(np.int64)
+    wait0 = schedule(lambda d, w: first_wait(model, d, w))
+    duration = np.array([wave_duration(model, w) for w in range(1, waves + 1)])
+    counts = np.array([base_count(model, w) for w in range(1, waves + 1)], dtype=np.float64)
+    hp_t, reward_t = _tier_table(model, int(tier.max()) + int(p["over_tier_max"]))
+
+    offer_cost = np.array([c for _, c in model["offers"]], dtype=np.float64)
+    offer_weapon = np.array([k == "weapon" for k, _ in model["offers"]])
+    n_offers = min(int(p["offer_count"]), len(offer_cost))
+
+    skill = rng.lognormal(0.0, dps_sigma, rows) if dps_sigma > 0 else np.ones(rows)
+    level = np.ones(rows, dtype=np.int64)
+    xp = np.zeros(rows, dtype=np.int64)
+    wallet = np.zeros(rows, dtype=np.int64)
+    bought = np.zeros(rows, dtype=np.int64)
+    alive = np.zeros(rows)
+    hp_pool = np.zeros(rows)
+    reward_pool = np.zeros(rows)
+    carry = np.zeros(rows)
+
+    names = ("spawned", "kills", "peak_alive", "alive_end", "reward", "level", "wallet", "purchases", "offer_price")
+    out = {name: np.zeros((rows, waves)) for name in names}
+
+    def fight(mask, dt, dps_now, kills_acc, reward_acc):
+        nonlocal alive, hp_pool, reward_pool, carry
+        has = mask & (alive > 0)
+        safe = np.maximum(alive, 1.0)
+        avg_hp = hp_pool / safe
+        avg_reward = reward_pool / safe
+        dmg = np.where(has, dps_now * dt + carry, 0.0)
+        kills = np.where(has, np.minimum(alive, np.floor(dmg / np.maximum(avg_hp, 1e-9))), 0.0)
+        left = alive - kills
+        # Leftover damage chips the next enemy; it is lost once the field is clear.
+        carry = np.where(has & (left > 0), np.minimum(dmg - kills * avg_hp, avg_hp), np.where(mask, 0.0, carry))
+        alive = left
+        hp_pool = np.where(left > 0, hp_pool - kills * avg_hp, 0.0)
+        reward_pool = np.where(left > 0, reward_pool - kills * avg_reward, 0.0)
+        kills_acc += kills
+        reward_acc += kills * avg_reward
+
+    for wi in range(waves):
+        w = wi + 1
+        dps_now = dps * skill * (1.0 + level_gain * (level - 1)) * np.power(1.0 + buy_gain, bought)
+        kills_acc = np.zeros(rows)
+        reward_acc = np.zeros(rows)
+        spawned = np.zeros(rows)
+        peak = alive.copy()
+        if p["boss_every"] > 0 and w % int(p["boss_every"]) == 0:
+            b_hp, _, b_reward = boss_stats(model, w)
+            alive += 1
+            hp_pool += b_hp
+            reward_pool += b_reward
+            spawned += 1
+
+        s_cap, h_cap = soft[:, wi], hard[:, wi]
+        low_thresh = _round_np(s_cap * p["LOW_ENEMY_FRACTION"])
+        count0 = _round_np(counts[wi] * count_mult)
+        over_count = max(1, gd_round(counts[wi] * p["over_count_frac"]))
+        gmax = group_max + min(max(math.floor(w / p["group_wave_every"]), 0), p["group_wave_max"])
+        gmin = p["group_min"]
+
+        t = np.zeros(rows)
+        wait = wait0[:, wi].copy()
+        while True:
+            active = t + wait <= duration[wi]
+            if not active.any():
+                break
+            fight(active, wait, dps_now, kills_acc, reward_acc)
+            t = np.where(active, t + wait, t)
+
+            # _adjust_spawning() then _spawn_enemies_grouped(), on the live count.
+            over = alive > s_cap
+            low = ~over & (alive < low_thresh)
+            boost = np.where(alive <= p["VERY_LOW_ENEMIES"], p["VERY_LOW_BOOST"], p["LOW_ENEMY_BOOST"])
+            count = np.where(over, over_count, count0)
+            count = np.where(low, np.maximum(np.ceil(count0 * boost), np.maximum(0.0, low_thresh - alive)), count)
+            count = np.minimum(count, np.maximum(0.0, h_cap - alive))
+            over_by = np.minimum(p["over_tier_max"], np.floor((alive - s_cap) / p["over_tier_every"]) + 1)
+            g_tier = tier[:, wi] + np.where(over, over_by, 0).astype(np.int64)
+            rand_size = np.floor(rng.random(rows) * (gmax - gmin + 1)) + gmin
+            gsize = np.where(low, np.minimum(np.maximum(gmin, count), gmax),
+                             np.clip(rand_size, 1, np.maximum(1.0, count)))
+            spawn = active & (count > 0)
+            gsize = np.where(spawn, gsize, 0.0)
+            alive += gsize
+            hp_pool += gsize * hp_t[g_tier]
+            reward_pool += gsize * reward_t[g_tier]
+            spawned += gsize
+            peak = np.maximum(peak, alive)
+
+            gap = rng.uniform(p["GROUP_GAP_MIN"], p["GROUP_GAP_MAX"], rows)
+            gap = np.where(over, np.minimum(p["GROUP_GAP_MAX"] + p["gap_over_add"], gap * p["gap_over_mult"]),
+                           np.where(low, np.maximum(p["LOW_ENEMY_MIN_GAP"], gap * p["gap_low_mult"]),
+                                    np.maximum(p["GROUP_GAP_MIN"] * p["gap_norm_floor"], gap * p["gap_norm_mult"])))
+            backoff = np.minimum(p["backoff_max"],
+                                 np.minimum(p["adjust_over_max"], wait * p["adjust_over_mult"]) * p["backoff_mult"])
+            wait = np.where(active, np.where(count > 0, gap, backoff), wait)
+
+        # Fight on until the wave timer runs out.
+        fight(np.ones(rows, dtype=bool), duration[wi] - t, dps_now, kills_acc, reward_acc)
+
+        # Intermission: add_score() per kill, then level-ups, wallet and shop.
+        earned = _round_np(reward_acc).astype(np.int64)
+        xp += earned
+        need = xp_need_np(model, level)
+        while True:
+            up = xp >= need
+            if not up.any():
+                break
+            xp = np.where(up, xp - need, xp)
+            level = np.where(up, level + 1, level)
+            need = xp_need_np(model, level)
+        wallet += earned
+
+        cheapest = np.full(rows, np.inf)
+        for _ in range(n_offers):
+            pick = rng.integers(0, len(offer_cost), rows)
+            cost = offer_cost[pick]
+            roll = rng.random(rows)
+            o_tier = np.ones(rows)
+            for t_val, prob in tier_probabilities(model, w):
+                hit = (o_tier == 1) & (roll < prob)
+                o_tier = np.where(hit, t_val, o_tier)
+                roll = np.where(hit, roll, roll - prob)
+            o_tier = np.where(offer_weapon[pick], o_tier, 1)
+            cost = np.where(o_tier > 1, _round_np(cost * np.power(p["tier_cost_mult"], o_tier - 1)), cost)
+            price = np.maximum(1, _round_np(cost * math.pow(p["price_wave_mult"], float(max(0, w - 1)))))
+            cheapest = np.minimum(cheapest, price)
+            buy = wallet >= price
+            wallet = np.where(buy, wallet - price.astype(np.int64), wallet)
+            bought += buy
+
+        out["spawned"][:, wi] = spawned
+        out["kills"][:, wi] = kills_acc
+        out["peak_alive"][:, wi] = peak
+        out["alive_end"][:, wi] = alive
+        out["reward"][:, wi] = earned
+        out["level"][:, wi] = level
+        out["wallet"][:, wi] = wallet
+        out["purchases"][:, wi] = bought
+        out["offer_price"][:, wi] = cheapest
+
+    return {d: {name: arr[diff_idx == i] for name, arr in out.items()} for i, d in enumerate(difficulties)}
+
+# --------------------------- Reports -----------------------------------------
+
+def percentile_rows(model: Dict, difficulty: str, metrics: Dict[str, "np.ndarray"],
+                    percentiles: Sequence[int]) -> List[Dict[str, float]]:
+    waves = next(iter(metrics.values())).shape[1]
+    tables = {name: np.percentile(arr, percentiles, axis=0) for name, arr in metrics.items()}
+    rows: List[Dict[str, float]] = []
+    for wi in range(waves):
+        w = wi + 1
+        row: Dict[str, float] = {
+            "wave": w,
+            "duration": wave_duration(model, w),
+            "soft_cap": soft_cap(model, difficulty, w),
+            "hard_cap": hard_cap(model, difficulty, w),
+            "tier": tier_for_wave(model, difficulty, w),
+        }
+        for name, table in tables.items():
+            for k, pct in enumerate(percentiles):
+                row[f"{name}_p{pct}"] = round(float(table[k, wi]), 2)
+        rows.append(row)
+    return rows
+
+def write_csv(path: str, rows: List[Dict[str, float]]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+# --------------------------- Self-test ---------------------------------------
+
+def self_test(model: Dict) -> List[str]:
+    """Mismatches between the extracted model, HAND_VALUES and the vectorized tables."""
+    funcs = {
+        "xp_for_next_level": xp_for_next_level, "wave_duration": wave_duration, "cap_scale": cap_scale,
+        "soft_cap": soft_cap, "hard_cap": hard_cap, "tier_for_wave": tier_for_wave, "spawn_count": spawn_count,
+        "first_wait": first_wait, "enemy_stats": enemy_stats, "boss_stats": boss_stats, "offer_price": offer_price,
+    }
+    failures: List[str] = []
+    for name, args, expected in HAND_VALUES:
+        got = funcs[name](model, *args)
+        ok = got == expected if isinstance(expected, tuple) else math.isclose(got, expected, abs_tol=1e-9)
+        if not ok:
+            failures.append(f"{name}{args}: expected {expected}, got {got}")
+    if np is not None:
+        levels = np.arange(1, 201)
+        vec = xp_need_np(model, levels)
+        for lv, need in zip(levels.tolist(), vec.tolist()):
+            if need != xp_for_next_level(model, lv):
+                failures.append(f"xp_need_np({lv}) = {need}, scalar {xp_for_next_level(model, lv)}")
+        x = np.array([-2.5, -0.5, 0.5, 1.5, 2.5, 2.4999])
+        if _round_np(x).tolist() != [float(gd_round(v)) for v in x.tolist()]:
+            failures.append("_round_np() disagrees with GDScript round()")
+    return failures
+
+# --------------------------- CLI --------------------------------------------
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description="Simulate wave/economy balance from the game's formulas")
+    ap.add_argument("path", nargs="?", default=".", help="Project root or any dir inside it (default: .)")
+    ap.add_argument("--difficulty", action="append", choices=DIFFICULTIES,
+                    help="Difficulty to simulate (repeatable; default: all)")
+    ap.add_argument("--runs", type=int, default=10000, help="Seeded runs per difficulty (default: 10000)")
+    ap.add_argument("--waves", type=int, default=40, help="Waves per run (default: 40)")
+    ap.add_argument("--seed", type=int, default=0, help="RNG seed (default: 0)")
+    ap.add_argument("--dps", type=float, default=30.0, help="Player damage/sec at level 1 with no purchases (default: 30)")
+    ap.add_argument("--dps-sigma", type=float, default=0.25, help="Log-normal spread of player skill (default: 0.25)")
+    ap.add_argument("--level-gain", type=float, default=0.08, help="DPS gained per level (default: 0.08 = +8%%)")
+    ap.add_argument("--buy-gain", type=float, default=0.10, help="DPS multiplier per shop purchase (default: 0.10)")
+    ap.add_argument("--percentiles", default=",".join(str(p) for p in PERCENTILES),
+                    help="Comma-separated percentiles (default: 5,25,50,75,95)")
+    ap.add_argument("--out", default=os.path.join("build", "balance"),
+                    help="Output dir for CSV tables + summary.json, relative to the project root (default: build/balance)")
+    ap.add_argument("--self-test", action="store_true", help="Check the extracted formulas against hand-computed values")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.path):
+        print(f"Not a directory: {args.path}", file=sys.stderr)
+        return 2
+    root = find_project_root(args.path)
+    try:
+        model = extract_model(root)
+    except SourceError as e:
+        print(f"Model extraction failed: {e}", file=sys.stderr)
+        return 2
+
+    if args.self_test:
+        failures = self_test(model)
+        for f in failures:
+            print(f"FAIL {f}")
+        checked = len(HAND_VALUES) + (200 if np is not None else 0)
+        print(f"{'FAILED' if failures else 'OK'}: {checked - len(failures)}/{checked} checks"
+              + ("" if np is not None else " (numpy missing: vectorized checks skipped)"))
+        return 1 if failures else 0
+
+    if np is None:
+        print("numpy is required for simulation: pip install numpy", file=sys.stderr)
+        return 2
+    try:
+        percentiles = [int(p) for p in args.percentiles.split(",") if p.strip()]
+    except ValueError:
+        print(f"--percentiles expects integers, got: {args.percentiles}", file=sys.stderr)
+        return 2
+    difficulties = [d for d in (args.difficulty or list(model["difficulties"])) if d in model["difficulties"]]
+
+    t0 = time.perf_counter()
+    results = simulate(model, difficulties, args.runs, args.waves, args.seed,
+                       args.dps, args.dps_sigma, args.level_gain, args.buy_gain)
+    elapsed = time.perf_counter() - t0
+
+    out_dir = args.out if os.path.isabs(args.out) else os.path.join(root, args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    tables: Dict[str, str] = {}
+    for d in difficulties:
+        rows = percentile_rows(model, d, results[d], percentiles)
+        path = os.path.join(out_dir, f"balance_{d.lower()}.csv")
+        write_csv(path, rows)
+        tables[d] = os.path.relpath(path, root).replace("\\", "/")
+    summary = {
+        "commit": git_head(root),
+        "runs": args.runs,
+        "waves": args.waves,
+        "seed": args.seed,
+        "player": {"dps": args.dps, "dps_sigma": args.dps_sigma, "level_gain": args.level_gain,
+                   "buy_gain": args.buy_gain},
+        "seconds": round(elapsed, 3),
+        "model": {k: v for k, v in model.items() if k != "offers"},
+        "tables": tables,
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        f.write(json.dumps(summary, indent=2) + "\n")
+    print(f"Simulated {len(difficulties)} difficulties x {args.runs} runs x {args.waves} waves "
+          f"in {elapsed:.2f}s -> {os.path.relpath(out_dir, root)}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
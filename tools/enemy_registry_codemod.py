@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+enemy_registry_codemod.py
+
+Codegen + codemod that replaces per-frame get_nodes_in_group("enemies") scans with
+an autoloaded spatial hash (EnemyRegistry).
+
+Key points:
+- Generates scripts/enemy_registry.gd: uniform-grid spatial hash with
+  register()/unregister(), nearest(pos, max_range), query_radius(pos, r) and
+  active_count(). Enemies are re-bucketed once per physics frame.
+- Registers the autoload in project.godot ([autoload] EnemyRegistry=...).
+- Hooks enemy.gd activate()/deactivate() (and boss.gd activate()/_exit_tree()) into
+  the registry.
+- Rewrites the known linear-scan call sites:
+    player.gd  _get_nearest_enemy()           -> EnemyRegistry.nearest(pos)
+    turret.gd  _get_nearest_enemy_in_range()  -> EnemyRegistry.nearest(pos, range)
+    player.gd  _emit_hemorrhage_shockwave()   -> EnemyRegistry.query_radius(pos, r)
+    enemy.gd   _apply_shock_arcs()            -> EnemyRegistry.query_radius(pos, r)
+    main.gd    _active_enemies_count()        -> EnemyRegistry.active_count()
+- Generates a headless benchmark scene comparing old vs new queries at 100/1k/5k enemies:
+    godot4 --headless --path . res://scenes/EnemyQueryBench.tscn
+- Idempotent: already-migrated functions are left alone; a function whose body no
+  longer looks like the expected scan is reported and skipped, never guessed at.
+- --check reports pending changes and exits 1 (CI); --write applies them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# --------------------------- Templates ---------------------------------------
+# Written with 4-space indents; converted to tabs on emit to match the .gd files.
+
+REGISTRY_PATH = "scripts/enemy_registry.gd"
+BENCH_SCRIPT_PATH = "scripts/enemy_query_bench.gd"
+BENCH_SCENE_PATH = "scenes/EnemyQueryBench.tscn"
+AUTOLOAD_NAME = "EnemyRegistry"
+DEFAULT_CELL_SIZE = 128.0
+
+GENERATED_HEADER = "# Generated by tools/enemy_registry_codemod.py; edit the template there, not this file."
+
+REGISTRY_TEMPLATE = '''extends Node
+{header}
+# Autoload "EnemyRegistry": uniform-grid spatial hash of active enemies.
+# Enemies register in activate() and unregister in deactivate(); freed or
+# deactivated nodes are pruned by _rebucket() and active_count(). Positions are
+# re-bucketed once per physics frame, so shooters pay for the cells they touch
+# instead of a full get_nodes_in_group("enemies") scan.
+
+const CELL_SIZE: float = {cell_size}
+# Extra ring of cells scanned by query_radius(): an enemy can have crossed at most
+# one cell boundary since the last _rebucket().
+const STALE_CELLS: int = 1
+
+var _enemies: Dictionary = {{}}   # instance_id -> Node2D
+var _cell_of: Dictionary = {{}}   # instance_id -> Vector2i
+var _cells: Dictionary = {{}}     # Vector2i -> Array[int] (instance ids)
+var _min_cell: Vector2i = Vector2i.ZERO
+var _max_cell: Vector2i = Vector2i.ZERO
+
+# Scratch state for nearest() so the ring scan does not allocate.
+var _q_best: Node2D = null
+var _q_best_d2: float = INF
+
+func _ready() -> void:
+    # Re-bucket before enemies move and shooters query in the same frame.
+    process_physics_priority = -100
+
+func _physics_process(_delta: float) -> void:
+    _rebucket()
+
+func register(e: Node2D) -> void:
+    if e == null:
+        return
+    var id: int = e.get_instance_id()
+    if _enemies.has(id):
+        return
+    _enemies[id] = e
+    var c: Vector2i = _cell_for(e.global_position)
+    _insert(id, c)
+    if _enemies.size() == 1:
+        _min_cell = c
+        _max_cell = c
+    else:
+        _grow_bounds(c)
+
+func unregister(e: Node2D) -> void:
+    if e == null:
+        return
+    _remove(e.get_instance_id())
+
+# Prunes freed and deactivated entries first, so the count never lags a frame.
+func active_count() -> int:
+    for id in _enemies.keys():
+        if not _is_live(_enemies[id]):
+            _remove(id)
+    return _enemies.size()
+
+# Nearest usable enemy to pos within max_range (INF = anywhere), or null.
+func nearest(pos: Vector2, max_range: float = INF) -> Node2D:
+    if _enemies.is_empty():
+        return null
+    _q_best = null
+    _q_best_d2 = max_range * max_range
+    var center: Vector2i = _cell_for(pos)
+    # Never walk past the occupied bounds; a finite range can stop sooner.
+    var max_ring: int = max(
+        max(abs(center.x - _min_cell.x), abs(_max_cell.x - center.x)),
+        max(abs(center.y - _min_cell.y), abs(_max_cell.y - center.y)))
+    if not is_inf(max_range):
+        max_ring = min(max_ring, int(ceil(max_range / CELL_SIZE)))
+    for ring in range(max_ring + 1):
+        # Everything in this ring is at least (ring - 1) cells away.
+        if _q_best != null and ring > 1:
+            var ring_min: float = float(ring - 1) * CELL_SIZE
+            if ring_min * ring_min > _q_best_d2:
+                break
+        if ring == 0:
+            _scan_cell(center, pos)
+            continue
+        for dx in range(-ring, ring + 1):
+            _scan_cell(Vector2i(center.x + dx, center.y - ring), pos)
+            _scan_cell(Vector2i(center.x + dx, center.y + ring), pos)
+        for dy in range(-ring + 1, ring):
+            _scan_cell(Vector2i(center.x - ring, center.y + dy), pos)
+            _scan_cell(Vector2i(center.x + ring, center.y + dy), pos)
+    var found: Node2D = _q_best
+    _q_best = null
+    return found
+
+# All usable enemies within r of pos (unordered). Safe to damage/kill while iterating.
+# Buckets can be one physics tick old, so the scan is padded by STALE_CELLS and
+# every hit is tested against the enemy's current position.
+func query_radius(pos: Vector2, r: float, exclude: Node = null) -> Array[Node2D]:
+    var out: Array[Node2D] = []
+    if _enemies.is_empty() or r < 0.0:
+        return out
+    var r2: float = r * r
+    var lo: Vector2i = _cell_for(pos - Vector2(r, r)) - Vector2i(STALE_CELLS, STALE_CELLS)
+    var hi: Vector2i = _cell_for(pos + Vector2(r, r)) + Vector2i(STALE_CELLS, STALE_CELLS)
+    lo = Vector2i(max(lo.x, _min_cell.x), max(lo.y, _min_cell.y))
+    hi = Vector2i(min(hi.x, _max_cell.x), min(hi.y, _max_cell.y))
+    for cx in range(lo.x, hi.x + 1):
+        for cy in range(lo.y, hi.y + 1):
+            var bucket: Variant = _cells.get(Vector2i(cx, cy))
+            if bucket == null:
+                continue
+            for id in bucket:
+                var e: Node2D = _usable(id)
+                if e == null or e == exclude:
+                    continue
+                if pos.distance_squared_to(e.global_position) <= r2:
+                    out.append(e)
+    return out
+
+func _scan_cell(c: Vector2i, pos: Vector2) -> void:
+    var bucket: Variant = _cells.get(c)
+    if bucket == null:
+        return
+    for id in bucket:
+        var e: Node2D = _usable(id)
+        if e == null:
+            continue
+        var d2: float = pos.distance_squared_to(e.global_position)
+        if d2 < _q_best_d2:
+            _q_best_d2 = d2
+            _q_best = e
+
+func _usable(id: int) -> Node2D:
+    var e: Variant = _enemies.get(id)
+    if not _is_live(e):
+        return null
+    var n: Node2D = e
+    if not n.is_visible_in_tree():
+        return null
+    return n
+
+# Valid and not deactivated (pooled enemies expose an "active" flag).
+func _is_live(e: Variant) -> bool:
+    if e == null or not is_instance_valid(e):
+        return false
+    var a: Variant = e.get("active")
+    return a == null or bool(a)
+
+func _cell_for(p: Vector2) -> Vector2i:
+    return Vector2i(int(floor(p.x / CELL_SIZE)), int(floor(p.y / CELL_SIZE)))
+
+func _insert(id: int, c: Vector2i) -> void:
+    var bucket: Variant = _cells.get(c)
+    if bucket == null:
+        var fresh: Array[int] = [id]
+        _cells[c] = fresh
+    else:
+        bucket.append(id)
+    _cell_of[id] = c
+
+func _remove(id: int) -> void:
+    if not _enemies.has(id):
+        return
+    _enemies.erase(id)
+    var c: Variant = _cell_of.get(id)
+    _cell_of.erase(id)
+    if c == null:
+        return
+    var bucket: Variant = _cells.get(c)
+    if bucket == null:
+        return
+    bucket.erase(id)
+    if bucket.is_empty():
+        _cells.erase(c)
+
+func _grow_bounds(c: Vector2i) -> void:
+    _min_cell = Vector2i(min(_min_cell.x, c.x), min(_min_cell.y, c.y))
+    _max_cell = Vector2i(max(_max_cell.x, c.x), max(_max_cell.y, c.y))
+
+func _rebucket() -> void:
+    var first := true
+    for id in _enemies.keys():
+        var e: Variant = _enemies[id]
+        if not _is_live(e):
+            _remove(id)
+            continue
+        var c: Vector2i = _cell_for(e.global_position)
+        var old: Vector2i = _cell_of.get(id, c)
+        if old != c:
+            var bucket: Variant = _cells.get(old)
+            if bucket != null:
+                bucket.erase(id)
+                if bucket.is_empty():
+                    _cells.erase(old)
+            _insert(id, c)
+        if first:
+            _min_cell = c
+            _max_cell = c
+            first = false
+        else:
+            _grow_bounds(c)
+'''
+
+BENCH_SCRIPT_TEMPLATE = '''extends Node2D
+{header}
+# Headless benchmark: get_nodes_in_group("enemies") scans vs EnemyRegistry queries.
+# Run: godot4 --headless --path . res://scenes/EnemyQueryBench.tscn
+
+const SIZES: Array[int] = [100, 1000, 5000]
+const QUERIES: int = 200
+const ARENA: Vector2 = Vector2(1920.0, 1080.0)
+const RANGE: float = 400.0
+const RADIUS: float = 160.0
+
+func _ready() -> void:
+    seed(1234)
+    print("enemies  query           old_us/q   new_us/q   speedup")
+    for n in SIZES:
+        var spawned: Array[Node2D] = _spawn(n)
+        var probes: Array[Vector2] = []
+        for i in range(QUERIES):
+            probes.append(Vector2(randf() * ARENA.x, randf() * ARENA.y))
+        _report(n, "nearest", _time_old_nearest(probes, INF), _time_new_nearest(probes, INF))
+        _report(n, "nearest(range)", _time_old_nearest(probes, RANGE), _time_new_nearest(probes, RANGE))
+        _report(n, "query_radius", _time_old_radius(probes), _time_new_radius(probes))
+        _report(n, "active_count", _time_old_count(), _time_new_count())
+        for e in spawned:
+            EnemyRegistry.unregister(e)
+            e.free()
+    get_tree().quit()
+
+func _spawn(n: int) -> Array[Node2D]:
+    var out: Array[Node2D] = []
+    for i in range(n):
+        var e := Node2D.new()
+        add_child(e)
+        e.global_position = Vector2(randf() * ARENA.x, randf() * ARENA.y)
+        e.add_to_group("enemies")
+        EnemyRegistry.register(e)
+        out.append(e)
+    return out
+
+func _report(n: int, label: String, old_us: float, new_us: float) -> void:
+    var speedup: float = old_us / max(new_us, 0.001)
+    print("%7d  %-14s %9.2f  %9.2f  %7.1fx" % [n, label, old_us, new_us, speedup])
+
+# --- Old: linear group scans, as in the pre-registry call sites ---
+
+func _old_nearest(pos: Vector2, max_range: float) -> Node2D:
+    var enemies: Array = get_tree().get_nodes_in_group("enemies")
+    var nearest: Node2D = null
+    var min_d: float = max_range * max_range
+    for e in enemies:
+        if not is_instance_valid(e):
+            continue
+        var is_active := true
+        if e.has_method("get"):
+            var a: Variant = e.get("active")
+            if a != null:
+                is_active = bool(a)
+        if not is_active or not e.is_visible_in_tree():
+            continue
+        var d: float = pos.distance_squared_to(e.global_position)
+        if d < min_d:
+            min_d = d
+            nearest = e
+    return nearest
+
+func _time_old_nearest(probes: Array[Vector2], max_range: float) -> float:
+    var t0: int = Time.get_ticks_usec()
+    for p in probes:
+        _old_nearest(p, max_range)
+    return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_old_radius(probes: Array[Vector2]) -> float:
+    var t0: int = Time.get_ticks_usec()
+    for p in probes:
+        var hits: int = 0
+        for e in get_tree().get_nodes_in_group("enemies"):
+            if not is_instance_valid(e) or not e.is_visible_in_tree():
+                continue
+            if p.distance_to(e.global_position) <= RADIUS:
+                hits += 1
+    return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_old_count() -> float:
+    var t0: int = Time.get_ticks_usec()
+    for i in range(QUERIES):
+        var total: int = 0
+        for e in get_tree().get_nodes_in_group("enemies"):
+            if is_instance_valid(e):
+                total += 1
+    return float(Time.get_ticks_usec() - t0) / float(QUERIES)
+
+# --- New: EnemyRegistry ---
+
+func _time_new_nearest(probes: Array[Vector2], max_range: float) -> float:
+    var t0: int = Time.get_ticks_usec()
+    for p in probes:
+        EnemyRegistry.nearest(p, max_range)
+    return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_new_radius(probes: Array[Vector2]) -> float:
+    var t0: int = Time.get_ticks_usec()
+    for p in probes:
+        EnemyRegistry.query_radius(p, RADIUS)
+    return float(Time.get_ticks_usec() - t0) / float(probes.size())
+
+func _time_new_count() -> float:
+    var t0: int = Time.get_ticks_usec()
+    for i in range(QUERIES):
+        EnemyRegistry.active_count()
+    return float(Time.get_ticks_usec() - t0) / float(QUERIES)
+'''
+
+BENCH_SCENE_TEMPLATE = '''[gd_scene load_steps=2 format=3]
+
+[ext_resource type="Script" path="res://{script}" id="1"]
+
+[node name="EnemyQueryBench" type="Node2D"]
+script = ExtResource("1")
+'''
+
+# Function-level rewrites: (file, function, marker that must be in the old body, new function).
+class Rewrite(NamedTuple):
+    path: str
+    func: str
+    old_marker: str
+    new_text: str
+
+REWRITES: Tuple[Rewrite, ...] = (
+    Rewrite("scripts/player.gd", "_get_nearest_enemy", 'get_nodes_in_group("enemies")', '''func _get_nearest_enemy() -> Node2D:
+    return EnemyRegistry.nearest(global_position)
+'''),
+    Rewrite("scripts/turret.gd", "_get_nearest_enemy_in_range", 'get_nodes_in_group("enemies")', '''func _get_nearest_enemy_in_range() -> Node2D:
+    return EnemyRegistry.nearest(global_position, attack_range)
+'''),
+    Rewrite("scripts/player.gd", "_emit_hemorrhage_shockwave", 'get_nodes_in_group("enemies")', '''func _emit_hemorrhage_shockwave(damage: int) -> void:
+    if damage <= 0:
+        return
+    var radius: float = hemorrhage_shockwave_radius if hemorrhage_shockwave_radius > 0.0 else HEMORRHAGE_SHOCKWAVE_BASE_RADIUS
+    for enemy in EnemyRegistry.query_radius(global_position, radius):
+        if not enemy.has_method("take_damage"):
+            continue
+        enemy.set("last_damage_source", {"kind":"item", "item_id":"hemorrhage_engine"})
+        enemy.call("take_damage", damage)
+    _spawn_hemorrhage_shockwave_visual(radius)
+'''),
+    Rewrite("scripts/enemy.gd", "_apply_shock_arcs", 'get_nodes_in_group("enemies")', '''func _apply_shock_arcs(base_damage: int, count: int, radius: float, factor: float) -> void:
+    var enemies: Array[Node2D] = EnemyRegistry.query_radius(global_position, radius, self)
+    var hits := 0
+    for e in enemies:
+        if hits >= count:
+            break
+        if not e.has_method("take_damage"):
+            continue
+        var pos: Vector2 = e.global_position
+        var arc_base: int = int(round(float(base_damage) * factor))
+        var arc_dmg: int = arc_base
+        var is_crit := false
+        # Allow arcs to crit using the player's crit stats
+        var player = get_tree().get_first_node_in_group("player")
+        if player != null and player.has_method("compute_crit_result"):
+            var res: Dictionary = player.compute_crit_result(arc_base)
+            arc_dmg = int(res.get("damage", arc_base))
+            is_crit = bool(res.get("crit", false))
+        e.take_damage(arc_dmg)
+        if e.has_method("show_damage_feedback"):
+            e.show_damage_feedback(arc_dmg, is_crit, e.global_position)
+        hits += 1
+        _spawn_shock_arc(global_position, pos)
+'''),
+    Rewrite("scripts/main.gd", "_active_enemies_count", 'get_nodes_in_group("enemies")', '''func _active_enemies_count() -> int:
+    return EnemyRegistry.active_count()
+'''),
+)
+
+# Lines appended to the end of a function body: (file, function, line).
+HOOKS: Tuple[Tuple[str, str, str], ...] = (
+    ("scripts/enemy.gd", "activate", "EnemyRegistry.register(self)"),
+    ("scripts/enemy.gd", "deactivate", "EnemyRegistry.unregister(self)"),
+    ("scripts/boss.gd", "activate", "EnemyRegistry.register(self)"),
+    # Bosses are freed on death rather than pooled, so they unregister on exit.
+    ("scripts/boss.gd", "_exit_tree", "EnemyRegistry.unregister(self)"),
+)
+
+# Engine callbacks a hook may target; added to the script when it has none yet.
+CALLBACKS: Tuple[str, ...] = ("_exit_tree",)
+
+# --------------------------- Helpers -----------------------------------------
+
+def _tabs(text: str) -> str:
+    out = []
+    for line in text.splitlines(keepends=True):
+        stripped = line.lstrip(" ")
+        depth = (len(line) - len(stripped)) // 4
+        out.append("\t" * depth + stripped)
+    return "".join(out)
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except Exception:
+        return None
+    return raw.decode("utf-8", errors="replace")
+
+def _eol(text: str) -> str:
+    return "\r\n" if "\r\n" in text else "\n"
+
+def find_function(lines: List[str], name: str) -> Optional[Tuple[int, int]]:
+    """(start, end) line indices of a top-level 'func name(' including its body; end is exclusive."""
+    head = re.compile(r"^(?:static\s+)?func\s+" + re.escape(name) + r"\s*\(")
+    for i, ln in enumerate(lines):
+        if head.match(ln):
+            j = i + 1
+            last = i
+            while j < len(lines):
+                body = lines[j]
+                if body.strip() and not body[0] in " \t":
+                    break
+                if body.strip():
+                    last = j
+                j += 1
+            return i, last + 1
+    return None
+
+def apply_rewrite(text: str, rw: Rewrite) -> Tuple[str, str]:
+    """Return (new_text, status) where status is 'rewritten', 'migrated', 'missing' or 'unexpected'."""
+    eol = _eol(text)
+    lines = text.splitlines()
+    span = find_function(lines, rw.func)
+    if span is None:
+        return text, "missing"
+    start, end = span
+    body = "\n".join(lines[start:end])
+    if "EnemyRegistry." in body:
+        return text, "migrated"
+    if rw.old_marker not in body:
+        return text, "unexpected"
+    new_lines = _tabs(rw.new_text).rstrip("\n").split("\n")
+    lines[start:end] = new_lines
+    return eol.join(lines) + (eol if text.endswith(("\n", "\r\n")) else ""), "rewritten"
+
+def apply_hook(text: str, func: str, stmt: str) -> Tuple[str, str]:
+    eol = _eol(text)
+    lines = text.splitlines()
+    span = find_function(lines, func)
+    if span is None:
+        if func not in CALLBACKS:
+            return text, "missing"
+        while lines and not lines[-1].strip():
+            lines.pop()
+        lines += ["", f"func {func}() -> void:", "\t" + stmt]
+        return eol.join(lines) + eol, "rewritten"
+    start, end = span
+    if any(stmt in ln for ln in lines[start:end]):
+        return text, "migrated"
+    lines.insert(end, "\t" + stmt)
+    return eol.join(lines) + (eol if text.endswith(("\n", "\r\n")) else ""), "rewritten"
+
+def ensure_autoload(text: str, name: str, res_path: str) -> Tuple[str, str]:
+    entry = f'{name}="*{res_path}"'
+    if re.search(r"^" + re.escape(name) + r"=", text, re.MULTILINE):
+        return text, "migrated"
+    eol = _eol(text)
+    lines = text.splitlines()
+    for i, ln in enumerate(lines):
+        if ln.strip() == "[autoload]":
+            j = i + 1
+            while j < len(lines) and lines[j].strip() == "":
+                j += 1
+            lines.insert(j, entry)
+            return eol.join(lines) + eol, "rewritten"
+    # project.godot keeps sections sorted; slot [autoload] in alphabetically.
+    insert_at = len(lines)
+    for i, ln in enumerate(lines):
+        m = re.match(r"^\[(\w+)\]\s*$", ln)
+        if m and m.group(1) > "autoload":
+            insert_at = i
+            break
+    lines[insert_at:insert_at] = ["[autoload]", "", entry, ""]
+    return eol.join(lines) + eol, "rewritten"
+
+# --------------------------- Planning ----------------------------------------
+
+def plan(root: str, cell_size: float) -> Tuple[Dict[str, str], List[str]]:
+    """Compute {relative path: new content} for every file that would change, plus a log."""
+    changes: Dict[str, str] = {}
+    log: List[str] = []
+
+    def current(rel: str) -> Optional[str]:
+        if rel in changes:
+            return changes[rel]
+        return _read(os.path.join(root, rel))
+
+    generated = {
+        REGISTRY_PATH: _tabs(REGISTRY_TEMPLATE.format(header=GENERATED_HEADER, cell_size=repr(float(cell_size)))),
+        BENCH_SCRIPT_PATH: _tabs(BENCH_SCRIPT_TEMPLATE.format(header=GENERATED_HEADER)),
+        BENCH_SCENE_PATH: BENCH_SCENE_TEMPLATE.format(script=BENCH_SCRIPT_PATH),
+    }
+    for rel, content in generated.items():
+        if current(rel) != content:
+            changes[rel] = content
+            log.append(f"generate {rel}")
+
+    proj = current("project.godot")
+    if proj is None:
+        log.append("missing project.godot; autoload not registered")
+    else:
+        new, status = ensure_autoload(proj, AUTOLOAD_NAME, "res://" + REGISTRY_PATH)
+        if status == "rewritten":
+            changes["project.godot"] = new
+            log.append(f"autoload {AUTOLOAD_NAME} -> project.godot")
+
+    for rel, func, stmt in HOOKS:
+        text = current(rel)
+        if text is None:
+            log.append(f"skip {rel}: file not found")
+            continue
+        new, status = apply_hook(text, func, stmt)
+        if status == "rewritten":
+            changes[rel] = new
+            log.append(f"hook {rel}:{func}() -> {stmt}")
+        elif status == "missing":
+            log.append(f"skip {rel}:{func}(): function not found")
+
+    for rw in REWRITES:
+        text = current(rw.path)
+        if text is None:
+            log.append(f"skip {rw.path}: file not found")
+            continue
+        new, status = apply_rewrite(text, rw)
+        if status == "rewritten":
+            changes[rw.path] = new
+            log.append(f"rewrite {rw.path}:{rw.func}()")
+        elif status in ("missing", "unexpected"):
+            log.append(f"skip {rw.path}:{rw.func}(): {'function not found' if status == 'missing' else 'body changed, migrate by hand'}")
+    return changes, log
+
+# --------------------------- CLI --------------------------------------------
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(
+        description="Generate the EnemyRegistry autoload and rewrite enemy group scans to use it")
+    ap.add_argument("path", nargs="?", default=".", help="Project root (default: .)")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--write", action="store_true", help="Apply changes in place")
+    mode.add_argument("--check", action="store_true", help="List pending changes; exit 1 if any")
+    ap.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE,
+                    help=f"Spatial hash cell size in pixels (default: {DEFAULT_CELL_SIZE:g})")
+    args = ap.parse_args(argv)
+
+    root = os.path.abspath(args.path)
+    if not os.path.isfile(os.path.join(root, "project.godot")):
+        print(f"Not a Godot project root: {args.path}", file=sys.stderr)
+        return 2
+    if args.cell_size <= 0.0:
+        print("--cell-size must be > 0", file=sys.stderr)
+        return 2
+
+    changes, log = plan(root, args.cell_size)
+    for line in log:
+        print(line)
+
+    if args.write:
+        for rel, content in changes.items():
+            fp = os.path.join(root, rel)
+            os.makedirs(os.path.dirname(fp) or ".", exist_ok=True)
+            with open(fp, "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+        print(f"Updated {len(changes)} file(s)")
+        return 0
+
+    if not changes:
+        print("Up to date")
+        return 0
+    print(f"{len(changes)} file(s) would change")
+    return 1 if args.check else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
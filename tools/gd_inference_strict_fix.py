@@ -12,6 +12,8 @@ Key points:
 - Skips already-typed LHS unless --include-typed.
 - Preserves UTF-8 BOM, original line endings, whitespace, and comments.
 - Ignores tokens inside strings or after inline comments.
+- Streams the tree: files are enumerated lazily and read ahead on a small thread
+  pool under a bounded in-flight byte budget (--jobs / --max-inflight-mb).
 """
 
 from __future__ import annotations
@@ -21,7 +23,12 @@ import os
 import re
 import subprocess
 import sys
-from typing import Iterable, List, Sequence, Tuple
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_source import strip_strings, strip_trailing_comment  # noqa: E402
+from read_ahead import DEFAULT_JOBS, DEFAULT_MAX_BYTES, read_ahead, walk_files  # noqa: E402
 
 # --------------------------- Patterns & Heuristics ---------------------------
 
@@ -58,30 +65,8 @@ EMPTY_RHS_RE = re.compile(
 )
 
 # String/Comment handling
-_QUOTED = re.compile(r'("([^"\\]|\\.)*"|\'([^\'\\]|\\.)*\')')
-
-def _strip_strings(s: str) -> str:
-    return _QUOTED.sub(lambda m: ' ' * (m.end() - m.start()), s)
-
-def _strip_trailing_comment(s: str) -> str:
-    out = []
-    in_sq = in_dq = False
-    i = 0
-    while i < len(s):
-        c = s[i]
-        if c == '\\' and (in_sq or in_dq) and i + 1 < len(s):
-            out.append(c); out.append(s[i + 1]); i += 2; continue
-        if not in_sq and not in_dq and c == '#':
-            break
-        if c == '"' and not in_sq:
-            in_dq = not in_dq
-        elif c == "'" and not in_dq:
-            in_sq = not in_sq
-        out.append(c); i += 1
-    return ''.join(out)
-
 def _rhs_scan_text(rhs: str) -> str:
-    return _strip_strings(_strip_trailing_comment(rhs.strip()))
+    return strip_strings(strip_trailing_comment(rhs.strip()))
 
 def rhs_is_suspicious(rhs: str, extra: Iterable[str]) -> bool:
     # First: obvious "no set type" RHS
@@ -128,27 +113,20 @@ def git_list_files(mode: str) -> List[str]:
         return []
     return [ln.strip() for ln in res.stdout.splitlines() if ln.strip().endswith(".gd")]
 
-def collect_gd_files(root: str, excludes: Sequence[str], scope: str | None) -> List[str]:
+def collect_gd_files(root: str, excludes: Sequence[str], scope: str | None) -> Iterator[str]:
+    """Yield .gd files lazily; directory walks come out sorted per directory."""
     if scope in ("tracked", "staged", "changed"):
-        files = git_list_files(scope)
-        if not files:
-            return []
-        if root != ".":
-            rp = os.path.abspath(root)
-            files = [f for f in files if os.path.abspath(f).startswith(rp)]
-        files = [f for f in files if not should_exclude(f, excludes)]
-        return files
-
-    gd_files: List[str] = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        if should_exclude(dirpath, excludes):
-            continue
-        dirnames[:] = [d for d in dirnames if not should_exclude(os.path.join(dirpath, d), excludes)]
-        for name in filenames:
-            if name.endswith(".gd"):
-                gd_files.append(os.path.join(dirpath, name))
-    gd_files.sort()
-    return gd_files
+        rp = os.path.abspath(root) if root != "." else None
+        for f in git_list_files(scope):
+            if rp is not None and not os.path.abspath(f).startswith(rp):
+                continue
+            if not should_exclude(f, excludes):
+                yield f
+        return
+
+    yield from walk_files(root,
+                          skip_dir=lambda d: should_exclude(d, excludes),
+                          accept=lambda f: f.endswith(".gd"))
 
 # --------------------------- Core processing ---------------------------------
 
@@ -192,22 +170,21 @@ def process_line(
     return new_text.encode("utf-8"), True
 
 def scan(
-    paths: List[str],
+    paths: Iterable[str],
     write: bool,
     report: bool,
     include_typed: bool,
     extra_tokens: List[str],
     backup: bool,
     confirm: bool,
-    mode: str
+    mode: str,
+    jobs: int = DEFAULT_JOBS,
+    max_bytes: int = DEFAULT_MAX_BYTES
 ) -> Tuple[int, int]:
     total_hits = 0
     total_changes = 0
-    for fp in paths:
-        try:
-            with open(fp, "rb") as f:
-                raw = f.read()
-        except Exception:
+    for fp, raw, err in read_ahead(paths, jobs=jobs, max_bytes=max_bytes):
+        if err is not None or raw is None:
             continue
 
         if b":=" not in raw:
@@ -286,6 +263,10 @@ def main(argv: List[str]) -> int:
     ap.add_argument("--confirm", action="store_true", help="Prompt before modifying each file")
     ap.add_argument("--mode", choices=["variant", "equals"], default="variant",
                     help="Rewrite style: 'variant' -> ': Variant =' (default, strict-safe) or 'equals' -> '=' (legacy).")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                    help=f"Reader threads for read-ahead; 1 reads inline (default: {DEFAULT_JOBS})")
+    ap.add_argument("--max-inflight-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                    help="Upper bound on file bytes held by read-ahead (default: %(default)g)")
     args = ap.parse_args(argv)
 
     if args.list_patterns:
@@ -325,7 +306,9 @@ def main(argv: List[str]) -> int:
         extra_tokens=args.extra_token,
         backup=args.backup,
         confirm=args.confirm,
-        mode=args.mode
+        mode=args.mode,
+        jobs=args.jobs,
+        max_bytes=int(args.max_inflight_mb * 1024 * 1024)
     )
 
     if report:
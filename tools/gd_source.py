@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+gd_source.py
+
+Helpers for reading values straight out of GDScript source, shared by the
+analysis tools in this folder.
+
+Key points:
+- Text-level only: patterns for numeric consts, top-level funcs and the
+  _difficulty_params() table, plus string/comment stripping. Nothing is evaluated.
+- gd_round() matches GDScript round() (half away from zero), so ports of game
+  formulas produce the same integers.
+- git_head() tags reports with the commit they were produced from.
+- No Godot install required; standard library only.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import subprocess
+from typing import Tuple
+
+DEFAULT_EXCLUDES: Tuple[str, ...] = ("/.git/", "/.godot/", "/addons/", "/vendor/", "/build/")
+
+DIFFICULTIES: Tuple[str, ...] = ("Easy", "Normal", "Hard", "Insane")
+
+# --------------------------- Patterns ----------------------------------------
+
+CONST_NUM = re.compile(r"^\s*const\s+(?P<name>[A-Z_][A-Z0-9_]*)\s*(?::\s*\w+)?\s*:?=\s*(?P<value>-?\d+(?:\.\d+)?)\b")
+FUNC_HEAD = re.compile(r"^(?:static\s+)?func\s+(?P<name>\w+)\s*\(", re.M)
+
+# main.gd: '@export_enum("Easy", ...) var difficulty' and the per-difficulty
+# 'match' arms of _difficulty_params() ('"Name":' or '_:' followed by 'return {...}').
+DIFFICULTY_ENUM = re.compile(r"@export_enum\((?P<names>[^)]*)\)\s*var\s+difficulty\b")
+DIFFICULTY_RETURN = re.compile(r'^\s*(?:"(?P<name>\w+)"|(?P<default>_))\s*:\s*\n\s*return\s*\{(?P<body>[^}]*)\}', re.M)
+DICT_NUM = re.compile(r'"(?P<key>\w+)"\s*:\s*(?P<value>-?\d+(?:\.\d+)?)')
+
+_QUOTED = re.compile(r'("([^"\\]|\\.)*"|\'([^\'\\]|\\.)*\')')
+
+class SourceError(ValueError):
+    pass
+
+# --------------------------- Helpers -----------------------------------------
+
+def strip_strings(s: str) -> str:
+    """Blank out string literals, keeping column positions."""
+    return _QUOTED.sub(lambda m: ' ' * (m.end() - m.start()), s)
+
+def strip_trailing_comment(s: str) -> str:
+    """Drop a '#' comment that is not inside a string literal."""
+    out = []
+    in_sq = in_dq = False
+    i = 0
+    while i < len(s):
+        c = s[i]
+        if c == '\\' and (in_sq or in_dq) and i + 1 < len(s):
+            out.append(c); out.append(s[i + 1]); i += 2; continue
+        if not in_sq and not in_dq and c == '#':
+            break
+        if c == '"' and not in_sq:
+            in_dq = not in_dq
+        elif c == "'" and not in_dq:
+            in_sq = not in_sq
+        out.append(c); i += 1
+    return ''.join(out)
+
+def function_body(text: str, name: str) -> str:
+    """Source of 'func name(...)' up to the next top-level func."""
+    heads = list(FUNC_HEAD.finditer(text))
+    for i, m in enumerate(heads):
+        if m.group("name") == name:
+            end = heads[i + 1].start() if i + 1 < len(heads) else len(text)
+            return text[m.start():end]
+    raise SourceError(f"func {name}() not found")
+
+def gd_round(x: float) -> int:
+    # GDScript round() rounds half away from zero.
+    return int(math.floor(x + 0.5)) if x >= 0 else -int(math.floor(-x + 0.5))
+
+def git_head(root: str) -> str:
+    try:
+        res = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, check=False, text=True)
+    except Exception:
+        return ""
+    return res.stdout.strip() if res.returncode == 0 else ""
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+gd_strict_check.py
+
+Offline predictor for Godot strict-mode typing warnings, without launching Godot.
+
+Key points:
+- Reports the same warning codes the GDScript analyzer uses:
+    UNTYPED_DECLARATION   untyped 'var', untyped function parameters, missing '-> Type'
+    INFERENCE_ON_VARIANT  'var name := expr' where expr smells Variant-y
+- Reuses the fixer's patterns and heuristic tables (gd_inference_strict_fix.py), so a
+  clean run here means the fixer has nothing left to rewrite.
+- Honors '@warning_ignore(...)' on the declaration (or the line above it) and
+  '@warning_ignore_start(...)' / '@warning_ignore_restore(...)' regions.
+- Only looks at logical lines at bracket depth 0; multi-line signatures are joined.
+- Exit code 1 when any warning is reported (CI gate); launch Godot only to confirm.
+- '--self-test' runs SELF_TEST_CASES (known-clean and known-warning snippets).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_inference_strict_fix import (  # noqa: E402
+    PREFIX,
+    collect_gd_files,
+    rhs_is_suspicious,
+)
+from gd_source import strip_strings, strip_trailing_comment  # noqa: E402
+from read_ahead import read_ahead  # noqa: E402
+
+# --------------------------- Warning codes ------------------------------------
+
+UNTYPED_DECLARATION = "UNTYPED_DECLARATION"
+INFERENCE_ON_VARIANT = "INFERENCE_ON_VARIANT"
+ALL_CODES: Tuple[str, ...] = (UNTYPED_DECLARATION, INFERENCE_ON_VARIANT)
+
+# --------------------------- Patterns -----------------------------------------
+
+# Same decorator/prefix grammar as the fixer, but any declaration form:
+#   var x | var x = v | var x := v | var x: T | var x: T = v | var x: T:  (property)
+VAR_DECL = re.compile(
+    r"^(?P<indent>\s*)"
+    r"(?P<decorators>(?:@[^ \t]+\s+)*)"
+    r"(?P<prefixes>(?:" + PREFIX + r"\s+)*)"
+    r"var\s+"
+    r"(?P<name>[A-Za-z_]\w*)\s*"
+    r"(?P<rest>.*)$"
+)
+
+FUNC_DECL = re.compile(
+    r"^(?P<indent>\s*)"
+    r"(?P<decorators>(?:@[^ \t]+\s+)*)"
+    r"(?P<prefixes>(?:" + PREFIX + r"\s+)*)"
+    r"func\s+(?P<name>[A-Za-z_]\w*)\s*\("
+)
+
+# Property accessor bodies ('set(value):', 'get:' or 'get():') are function scope too.
+ACCESSOR_DECL = re.compile(r"^\s*(?:set\s*\(\s*[A-Za-z_]\w*\s*(?::\s*[\w.]+\s*)?\)|get(?:\s*\(\s*\))?)\s*:")
+
+# 'func' must be a whole word: funcs(a), funcref(x) and func_x(y) are plain calls.
+LAMBDA_START = re.compile(r"\bfunc\b(?:\s+(?P<name>[A-Za-z_]\w*))?\s*\(")
+
+WARNING_IGNORE = re.compile(r"@warning_ignore(?P<kind>_start|_restore)?\s*\((?P<args>[^)]*)\)")
+
+# Regression cases for '--self-test': (source, expected messages in order).
+SELF_TEST_CASES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("func f(a: int) -> void:\n\tpass\n", ()),
+    ("func f(a):\n\tpass\n",
+     ('Parameter "a" has no static type.', 'Function "f()" has no static return type.')),
+    ("var cb := func(x: int) -> int: return x\n", ()),
+    ("var cb: Callable = func(x): return x\n",
+     ('Parameter "x" has no static type.', 'Function "<anonymous lambda>()" has no static return type.')),
+    ("func _ready() -> void:\n\tvar c: int = funcs(a)\n", ()),
+    ("func _ready() -> void:\n\tvar r: Callable = funcref(self, \"x\")\n", ()),
+    ("func _ready() -> void:\n\tvar y: int = func_x(a) + my_func(b)\n", ()),
+    ("func _init(a: int):\n\tpass\n", ()),
+    ("var hp: int:\n\tset(value):\n\t\tvar v = value\n\t\thp = v\n\tget:\n\t\treturn hp\n",
+     ('Local variable "v" has no static type.',)),
+]
+
+# Functions the analyzer never asks a return type for.
+NO_RETURN_TYPE_FUNCS: Tuple[str, ...] = ("_init", "_static_init")
+
+# --------------------------- Data ---------------------------------------------
+
+class StrictWarning(NamedTuple):
+    path: str
+    line: int
+    code: str
+    message: str
+
+    def format(self) -> str:
+        return f"{self.path}:{self.line}: {self.code}: {self.message}"
+
+# --------------------------- Helpers ------------------------------------------
+
+def _code_text(s: str) -> str:
+    # Strings blanked, trailing comment dropped: safe to count brackets / look for tokens.
+    return strip_strings(strip_trailing_comment(s))
+
+def _bracket_delta(text: str) -> int:
+    return sum(text.count(c) for c in "([{") - sum(text.count(c) for c in ")]}")
+
+def _indent_width(s: str) -> int:
+    return len(s) - len(s.lstrip(" \t"))
+
+def _parse_ignores(text: str) -> Tuple[Set[str], Set[str], Set[str]]:
+    """Return (ignore, start, restore) code sets from any @warning_ignore* annotations."""
+    ignore: Set[str] = set()
+    start: Set[str] = set()
+    restore: Set[str] = set()
+    for m in WARNING_IGNORE.finditer(text):
+        codes = {a.strip().strip("\"'").upper() for a in m.group("args").split(",") if a.strip()}
+        kind = m.group("kind")
+        if kind == "_start":
+            start |= codes
+        elif kind == "_restore":
+            restore |= codes
+        else:
+            ignore |= codes
+    return ignore, start, restore
+
+def _split_top_level(s: str, sep: str = ",") -> List[str]:
+    parts: List[str] = []
+    depth = 0
+    cur: List[str] = []
+    for c in s:
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        if c == sep and depth == 0:
+            parts.append("".join(cur))
+            cur = []
+            continue
+        cur.append(c)
+    tail = "".join(cur)
+    if tail.strip():
+        parts.append(tail)
+    return parts
+
+def _match_paren(s: str, open_idx: int) -> int:
+    depth = 0
+    for i in range(open_idx, len(s)):
+        if s[i] == "(":
+            depth += 1
+        elif s[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+def _param_untyped(param: str) -> Optional[str]:
+    """Return the parameter name if it carries no static type, else None."""
+    p = param.strip()
+    if not p:
+        return None
+    m = re.match(r"([A-Za-z_]\w*)\s*(.*)$", p)
+    if not m:
+        return None
+    name, rest = m.group(1), m.group(2).lstrip()
+    if rest.startswith(":"):  # 'a: T', 'a: T = v' and 'a := v' are all typed
+        return None
+    return name
+
+# --------------------------- Core checks --------------------------------------
+
+def check_var(code: str, extra_tokens: Iterable[str], local: bool) -> List[Tuple[str, str]]:
+    m = VAR_DECL.match(code)
+    if not m:
+        return []
+    name = m.group("name")
+    rest = m.group("rest").strip()
+    kind = "Local variable" if local else "Variable"
+
+    if rest.startswith(":="):
+        if rhs_is_suspicious(rest[2:], extra_tokens):
+            return [(INFERENCE_ON_VARIANT,
+                     "The variable type is being inferred from a Variant value, so it will be typed as Variant.")]
+        return []
+    if rest.startswith(":") and rest[1:].strip():
+        # 'var x: T', 'var x: T = v' or a typed property 'var x: T:'
+        return []
+    return [(UNTYPED_DECLARATION, f'{kind} "{name}" has no static type.')]
+
+def check_funcs(code: str) -> List[Tuple[str, str]]:
+    """Check named functions and inline lambdas on one logical line."""
+    out: List[Tuple[str, str]] = []
+    named = FUNC_DECL.match(code)
+    pos = 0
+    while True:
+        m = LAMBDA_START.search(code, pos)
+        if not m:
+            break
+        open_idx = m.end() - 1
+        close_idx = _match_paren(code, open_idx)
+        if close_idx < 0:
+            break
+        fname = m.group("name") if named is not None and m.end() == named.end() else None
+        for param in _split_top_level(code[open_idx + 1:close_idx]):
+            pname = _param_untyped(param)
+            if pname:
+                out.append((UNTYPED_DECLARATION, f'Parameter "{pname}" has no static type.'))
+        after = code[close_idx + 1:].lstrip()
+        if not after.startswith("->") and fname not in NO_RETURN_TYPE_FUNCS:
+            label = fname if fname else "<anonymous lambda>"
+            out.append((UNTYPED_DECLARATION, f'Function "{label}()" has no static return type.'))
+        pos = close_idx + 1
+    return out
+
+def check_source(path: str, text: str, extra_tokens: Iterable[str],
+                 ignored: Sequence[str] = ()) -> List[StrictWarning]:
+    warnings: List[StrictWarning] = []
+    lines = text.splitlines()
+    always_off: Set[str] = set(c.upper() for c in ignored)
+    region_off: Set[str] = set()
+    pending_ignore: Set[str] = set()
+    func_indent: Optional[int] = None
+
+    i = 0
+    while i < len(lines):
+        start_line = i + 1
+        raw = lines[i]
+        code = _code_text(raw)
+        # Join continuation lines (open brackets or trailing backslash) into one logical line.
+        depth = _bracket_delta(code)
+        while (depth > 0 or code.rstrip().endswith("\\")) and i + 1 < len(lines):
+            i += 1
+            nxt = _code_text(lines[i])
+            code = code.rstrip().rstrip("\\") + " " + nxt.strip()
+            depth += _bracket_delta(nxt)
+        i += 1
+
+        stripped = code.strip()
+        if not stripped:
+            continue
+
+        ignore, start, restore = _parse_ignores(raw)
+        region_off |= start
+        region_off -= restore
+        # An annotation-only line applies to the next statement.
+        if stripped.startswith("@") and not re.search(r"\b(?:var|func)\b", stripped):
+            pending_ignore |= ignore
+            continue
+        suppressed = pending_ignore | ignore | region_off | always_off
+        pending_ignore = set()
+
+        indent = _indent_width(code)
+        if func_indent is not None and indent <= func_indent:
+            func_indent = None
+        if FUNC_DECL.match(code) or ACCESSOR_DECL.match(code):
+            func_indent = indent
+
+        found: List[Tuple[str, str]] = []
+        found.extend(check_var(code, extra_tokens, local=func_indent is not None and indent > func_indent))
+        if "func" in code:
+            found.extend(check_funcs(code))
+        for wcode, msg in found:
+            if wcode not in suppressed:
+                warnings.append(StrictWarning(path, start_line, wcode, msg))
+    return warnings
+
+def check_bytes(path: str, raw: bytes, extra_tokens: Iterable[str], ignored: Sequence[str] = ()) -> List[StrictWarning]:
+    if raw.startswith(b"\xef\xbb\xbf"):
+        raw = raw[3:]
+    return check_source(path, raw.decode("utf-8", errors="replace"), extra_tokens, ignored)
+
+def summarize(warnings: Sequence[StrictWarning]) -> Dict[str, int]:
+    counts: Dict[str, int] = {c: 0 for c in ALL_CODES}
+    for w in warnings:
+        counts[w.code] = counts.get(w.code, 0) + 1
+    return counts
+
+def self_test() -> List[str]:
+    """Mismatches between check_source() and SELF_TEST_CASES."""
+    failures: List[str] = []
+    for source, expected in SELF_TEST_CASES:
+        got = tuple(w.message for w in check_source("<self-test>", source, ()))
+        if got != expected:
+            failures.append(f"{source!r}: expected {list(expected)}, got {list(got)}")
+    return failures
+
+# --------------------------- CLI --------------------------------------------
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(
+        description="Predict GDScript strict-mode typing warnings without launching Godot")
+    ap.add_argument("path", nargs="?", default=".", help="Root directory to scan (default: .)")
+    ap.add_argument("--ignore", action="append", default=[], choices=ALL_CODES,
+                    help="Warning code to skip (repeatable)")
+    ap.add_argument("--extra-token", action="append", default=[],
+                    help="Additional suspicious substring, as in the fixer (repeatable)")
+    ap.add_argument("--exclude", action="append",
+                    default=["/.git/", "/.godot/", "/addons/", "/vendor/", "/build/"],
+                    help="Dir substrings to skip (repeatable)")
+    scope = ap.add_mutually_exclusive_group()
+    scope.add_argument("--git-tracked", action="store_true", help="Limit to git tracked .gd files")
+    scope.add_argument("--staged", action="store_true", help="Limit to staged .gd files")
+    scope.add_argument("--changed-only", action="store_true", help="Limit to changed .gd files vs HEAD")
+    ap.add_argument("--json", action="store_true", help="Emit warnings and per-code counts as JSON")
+    ap.add_argument("--summary", action="store_true", help="Print per-code counts only")
+    ap.add_argument("--self-test", action="store_true", help="Run the built-in regression cases and exit")
+    args = ap.parse_args(argv)
+
+    if args.self_test:
+        failures = self_test()
+        for f in failures:
+            print(f"FAIL {f}")
+        print(f"{'FAILED' if failures else 'OK'}: {len(SELF_TEST_CASES) - len(failures)}/{len(SELF_TEST_CASES)} cases")
+        return 1 if failures else 0
+
+    scope_mode: str | None = None
+    if args.git_tracked:
+        scope_mode = "tracked"
+    elif args.staged:
+        scope_mode = "staged"
+    elif args.changed_only:
+        scope_mode = "changed"
+
+    if scope_mode is None and not os.path.isdir(args.path):
+        print(f"Not a directory: {args.path}", file=sys.stderr)
+        return 2
+    files = collect_gd_files(args.path, args.exclude, scope_mode)
+
+    warnings: List[StrictWarning] = []
+    checked = 0
+    for fp, raw, err in read_ahead(files):
+        checked += 1
+        if err is None and raw is not None:
+            warnings.extend(check_bytes(fp, raw, args.extra_token, args.ignore))
+
+    counts = summarize(warnings)
+    if args.json:
+        print(json.dumps({
+            "files": checked,
+            "counts": counts,
+            "warnings": [w._asdict() for w in warnings],
+        }, indent=2))
+    else:
+        if not args.summary:
+            for w in warnings:
+                print(w.format())
+        print(f"Checked {checked} file(s): "
+              + ", ".join(f"{code}={n}" for code, n in counts.items()))
+
+    return 1 if warnings else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+load_graph.py
+
+Resource load-graph analyzer for startup size and first-use hitches.
+
+Key points:
+- Builds the dependency graph Godot follows when loading the game:
+    project.godot   run/main_scene and [autoload] entries (the roots)
+    .tscn / .tres   [ext_resource] entries
+    .gd             preload("..."), extends "res://...", global class_name references
+                    (all resolved when the script loads) and load()/ResourceLoader.load()
+                    calls (resolved only when the code runs).
+  Each node carries its file size; uid:// paths are resolved via .uid files and
+  resource headers.
+- Startup closure: everything reachable from the roots over eager edges, with total
+  bytes, per-type breakdown and the largest files.
+- Lazy loads are classified by where they run: 'startup' (_ready/_init/class scope of
+  a script already in the startup closure), 'hot' (per-frame callbacks, signal/timer
+  handlers, spawn/fire/wave code, and same-script callees of those), or 'cold'.
+  Hot lazy loads are preload / warm-pool candidates; the report includes the bytes
+  each one pulls in that startup did not already load. Non-literal load(path) calls
+  are listed as unresolved.
+- Preloads whose holder (const/var) is never touched by startup or hot code are
+  lazy-load candidates, with the startup bytes dropping that edge would save.
+- Call reachability is per script (no cross-script call graph); dynamic node paths,
+  call()/callv with computed names and editor-imported assets (.godot/imported)
+  are out of scope. Source file sizes stand in for imported sizes.
+- Output is JSON (stdout or --out) tagged with the git commit, plus a Graphviz DOT
+  file with --dot. --check exits 1 when hot lazy loads exist.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_source import DEFAULT_EXCLUDES, git_head, strip_strings, strip_trailing_comment  # noqa: E402
+from read_ahead import walk_files  # noqa: E402
+from tscn_format import (  # noqa: E402
+    find_project_root,
+    fs_to_res,
+    parse_text_resource,
+    res_to_fs,
+    unquote,
+)
+
+PROJECT_NODE = "res://project.godot"
+RESOURCE_SUFFIXES: Tuple[str, ...] = (".tscn", ".tres", ".gd")
+
+# Edge kinds resolved as part of loading their source.
+EAGER_KINDS: Tuple[str, ...] = ("main_scene", "autoload", "ext_resource", "preload", "extends", "class")
+
+# --------------------------- Patterns ----------------------------------------
+
+FUNC_DEF = re.compile(r"^(?:static\s+)?func\s+(?P<name>\w+)\s*\(")
+HOLDER = re.compile(r"^\s*(?:@\w+(?:\([^)]*\))?\s+)*(?:static\s+)?(?:const|var)\s+(?P<name>\w+)")
+PRELOAD_CALL = re.compile(r"""\bpreload\(\s*(?P<q>["'])(?P<path>[^"']+)(?P=q)\s*\)""")
+LOAD_CALL = re.compile(r"(?P<call>(?<![\w.])load|ResourceLoader\.load(?:_threaded_request)?)\(\s*(?P<arg>[^,)]*)")
+STRING_ARG = re.compile(r"""^(?P<q>["'])(?P<path>[^"']+)(?P=q)$""")
+EXTENDS_PATH = re.compile(r"""^extends\s+(?P<q>["'])(?P<path>[^"']+)(?P=q)""")
+CLASS_NAME = re.compile(r"^class_name\s+(?P<name>\w+)", re.M)
+CALL_NAME = re.compile(r"\b(?P<name>[A-Za-z_]\w*)\s*\(")
+CALL_BY_STRING = re.compile(
+    r"""(?:Callable\(\s*self\s*,\s*|\bcall(?:_deferred)?\(\s*|\bconnect\(\s*["']\w+["']\s*,\s*)["'](?P<name>\w+)["']"""
+)
+CONNECT_BARE = re.compile(r"\bconnect\(\s*(?P<name>[A-Za-z_]\w*)\s*[,)]")
+UID_LITERAL = re.compile(r"uid://[0-9a-z]+")
+
+CLASS_SCOPE = "<class>"
+STARTUP_FUNCS: Set[str] = {CLASS_SCOPE, "_init", "_ready", "_enter_tree", "_static_init"}
+FRAME_FUNCS: Set[str] = {
+    "_process", "_physics_process", "_input", "_unhandled_input", "_unhandled_key_input",
+    "_gui_input", "_integrate_forces", "_draw",
+}
+HOT_NAME = re.compile(r"spawn|fire|shoot|wave|activate|take_damage|_on_\w*(?:timeout|entered|exited|died)")
+
+# --------------------------- Data --------------------------------------------
+
+@dataclass
+class Edge:
+    src: str
+    dst: str
+    kind: str                      # one of EAGER_KINDS or 'load'
+    line: int = 0
+    func: str = ""
+    symbol: str = ""               # const/var holding a class-scope preload
+    phase: str = ""                # lazy loads: startup | hot | cold
+
+@dataclass
+class ScriptInfo:
+    path: str
+    calls: Dict[str, Set[str]] = field(default_factory=dict)     # func -> same-script callees
+    uses: Dict[str, Set[str]] = field(default_factory=dict)      # holder symbol -> funcs using it
+    dynamic_loads: List[Tuple[int, str, str]] = field(default_factory=list)  # (line, func, expr)
+
+    def reachable(self, roots: Iterable[str]) -> Set[str]:
+        seen: Set[str] = set()
+        queue = deque(r for r in roots if r in self.calls)
+        while queue:
+            fn = queue.popleft()
+            if fn in seen:
+                continue
+            seen.add(fn)
+            queue.extend(c for c in self.calls.get(fn, ()) if c not in seen)
+        return seen
+
+    def startup_funcs(self) -> Set[str]:
+        return self.reachable(STARTUP_FUNCS)
+
+    def hot_funcs(self) -> Set[str]:
+        return self.reachable({f for f in self.calls if f in FRAME_FUNCS or HOT_NAME.search(f)})
+
+# --------------------------- Path resolution ---------------------------------
+
+def build_uid_map(project_root: str, files: Sequence[str]) -> Dict[str, str]:
+    """uid:// -> res:// from '<file>.uid' sidecars and resource header uids."""
+    uids: Dict[str, str] = {}
+    for fp in files:
+        side = fp + ".uid"
+        if os.path.isfile(side):
+            try:
+                with open(side, "r", encoding="utf-8", errors="replace") as f:
+                    m = UID_LITERAL.search(f.read())
+            except OSError:
+                m = None
+            if m:
+                uids[m.group(0)] = fs_to_res(fp, project_root)
+        if fp.endswith((".tscn", ".tres")):
+            try:
+                with open(fp, "r", encoding="utf-8", errors="replace") as f:
+                    head = f.readline()
+            except OSError:
+                continue
+            m = re.search(r'uid="(uid://[0-9a-z]+)"', head)
+            if m:
+                uids[m.group(1)] = fs_to_res(fp, project_root)
+    return uids
+
+def resolve(ref: str, owner_res: str, uids: Dict[str, str]) -> str:
+    ref = ref.strip()
+    if ref.startswith("uid://"):
+        return uids.get(ref, ref)
+    if ref.startswith("res://"):
+        return ref
+    # Relative to the referencing file, as preload()/load() allow.
+    base = posixpath.dirname(owner_res[len("res://"):])
+    return "res://" + posixpath.normpath(posixpath.join(base, ref))
+
+# --------------------------- Parsing -----------------------------------------
+
+def project_roots(project_root: str, uids: Dict[str, str]) -> List[Edge]:
+    fp = os.path.join(project_root, "project.godot")
+    try:
+        with open(fp, "r", encoding="utf-8", errors="replace") as f:
+            res = parse_text_resource(f.read(), fp)
+    except OSError:
+        return []
+    edges: List[Edge] = []
+    for sec in res.sections:
+        if sec.tag == "application":
+            main = sec.prop("run/main_scene")
+            if main:
+                edges.append(Edge(PROJECT_NODE, resolve(unquote(main), PROJECT_NODE, uids), "main_scene",
+                                  line=sec.line))
+        elif sec.tag == "autoload":
+            for name, raw in sec.props:
+                target = unquote(raw).lstrip("*")
+                edges.append(Edge(PROJECT_NODE, resolve(target, PROJECT_NODE, uids), "autoload",
+                                  line=sec.line, symbol=name))
+    return edges
+
+def resource_edges(fp: str, project_root: str, uids: Dict[str, str]) -> List[Edge]:
+    src = fs_to_res(fp, project_root)
+    try:
+        with open(fp, "r", encoding="utf-8", errors="replace") as f:
+            res = parse_text_resource(f.read(), fp)
+    except OSError:
+        return []
+    edges: List[Edge] = []
+    for sec in res.by_tag("ext_resource"):
+        path = sec.attr("path") or sec.attr("uid")
+        if path:
+            edges.append(Edge(src, resolve(path, src, uids), "ext_resource", line=sec.line))
+    return edges
+
+def script_edges(fp: str, project_root: str, uids: Dict[str, str],
+                 global_classes: Dict[str, str]) -> Tuple[List[Edge], ScriptInfo]:
+    src = fs_to_res(fp, project_root)
+    info = ScriptInfo(src)
+    try:
+        with open(fp, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().lstrip("\ufeff").splitlines()
+    except OSError:
+        return [], info
+
+    edges: List[Edge] = []
+    holders: Dict[str, int] = {}
+    bare_lines: List[Tuple[int, str, str]] = []   # (line, func, code without strings)
+    func = CLASS_SCOPE
+    info.calls[func] = set()
+    for lineno, line in enumerate(lines, start=1):
+        code = strip_trailing_comment(line)
+        if not code.strip():
+            continue
+        if not line[0].isspace():
+            m = FUNC_DEF.match(code)
+            func = m.group("name") if m else CLASS_SCOPE
+            info.calls.setdefault(func, set())
+        bare = strip_strings(code)
+        bare_lines.append((lineno, func, bare))
+
+        m = EXTENDS_PATH.match(code)
+        if m:
+            edges.append(Edge(src, resolve(m.group("path"), src, uids), "extends", line=lineno, func=func))
+        holder = HOLDER.match(code) if func == CLASS_SCOPE else None
+        for pm in PRELOAD_CALL.finditer(code):
+            symbol = holder.group("name") if holder else ""
+            if symbol:
+                holders[symbol] = lineno
+            edges.append(Edge(src, resolve(pm.group("path"), src, uids), "preload", line=lineno, func=func,
+                              symbol=symbol))
+        for lm in LOAD_CALL.finditer(code):
+            if bare[lm.start()] == " ":
+                continue  # inside a string literal
+            arg = lm.group("arg").strip()
+            sm = STRING_ARG.match(arg)
+            if sm:
+                edges.append(Edge(src, resolve(sm.group("path"), src, uids), "load", line=lineno, func=func))
+            elif arg:
+                info.dynamic_loads.append((lineno, func, f"{lm.group('call')}({arg})"))
+        for cm in CALL_NAME.finditer(bare):
+            info.calls[func].add(cm.group("name"))
+        for cm in CALL_BY_STRING.finditer(code):
+            info.calls[func].add(cm.group("name"))
+        for cm in CONNECT_BARE.finditer(bare):
+            info.calls[func].add(cm.group("name"))
+
+    defined = set(info.calls)
+    for fn in info.calls:
+        info.calls[fn] &= defined - {fn}
+
+    for symbol, decl_line in holders.items():
+        word = re.compile(r"\b%s\b" % re.escape(symbol))
+        info.uses[symbol] = {fn for ln, fn, bare in bare_lines if ln != decl_line and word.search(bare)}
+
+    own_class = next((n for n, p in global_classes.items() if p == src), None)
+    for name, target in global_classes.items():
+        if name == own_class:
+            continue
+        word = re.compile(r"\b%s\b" % re.escape(name))
+        hit = next(((ln, fn) for ln, fn, bare in bare_lines if word.search(bare)), None)
+        if hit:
+            edges.append(Edge(src, target, "class", line=hit[0], func=hit[1], symbol=name))
+    return edges, info
+
+def find_global_classes(project_root: str, scripts: Sequence[str]) -> Dict[str, str]:
+    classes: Dict[str, str] = {}
+    for fp in scripts:
+        try:
+            with open(fp, "r", encoding="utf-8", errors="replace") as f:
+                m = CLASS_NAME.search(f.read())
+        except OSError:
+            continue
+        if m:
+            classes[m.group("name")] = fs_to_res(fp, project_root)
+    return classes
+
+# --------------------------- Graph analysis ----------------------------------
+
+def closure(edges: Sequence[Edge], roots: Iterable[str], skip: Optional[Edge] = None) -> Set[str]:
+    """Nodes reachable from 'roots' over eager edges (optionally ignoring one edge)."""
+    out: Dict[str, List[str]] = {}
+    for e in edges:
+        if e.kind in EAGER_KINDS and e is not skip:
+            out.setdefault(e.src, []).append(e.dst)
+    seen: Set[str] = set()
+    queue = deque(roots)
+    while queue:
+        node = queue.popleft()
+        if node in seen:
+            continue
+        seen.add(node)
+        queue.extend(n for n in out.get(node, ()) if n not in seen)
+    return seen
+
+def _bytes(nodes: Iterable[str], sizes: Dict[str, int]) -> int:
+    return sum(sizes.get(n, 0) for n in nodes)
+
+def _type_of(res: str) -> str:
+    ext = os.path.splitext(res)[1].lstrip(".")
+    return ext or "other"
+
+def analyze(project_root: str, excludes: Sequence[str]) -> Dict:
+    files = list(walk_files(project_root,
+                            skip_dir=lambda d: any(ex in d.replace("\\", "/") + "/" for ex in excludes),
+                            accept=lambda f: f.endswith(RESOURCE_SUFFIXES)))
+    uids = build_uid_map(project_root, files)
+    scripts = [fp for fp in files if fp.endswith(".gd")]
+    global_classes = find_global_classes(project_root, scripts)
+
+    edges: List[Edge] = project_roots(project_root, uids)
+    infos: Dict[str, ScriptInfo] = {}
+    for fp in files:
+        if fp.endswith(".gd"):
+            script, info = script_edges(fp, project_root, uids, global_classes)
+            edges.extend(script)
+            infos[info.path] = info
+        else:
+            edges.extend(resource_edges(fp, project_root, uids))
+
+    nodes: Set[str] = {PROJECT_NODE} | {e.src for e in edges} | {e.dst for e in edges}
+    sizes: Dict[str, int] = {}
+    missing: List[str] = []
+    for n in sorted(nodes):
+        fs = res_to_fs(n, project_root)
+        if os.path.isfile(fs):
+            sizes[n] = os.path.getsize(fs)
+        elif not n.startswith("uid://"):
+            missing.append(n)
+
+    roots = [PROJECT_NODE]
+    startup = closure(edges, roots)
+
+    # Classify lazy loads by where they run.
+    lazy_hot: List[Dict] = []
+    lazy_other: List[Dict] = []
+    for e in edges:
+        if e.kind != "load":
+            continue
+        info = infos.get(e.src)
+        if info and e.src in startup and e.func in info.startup_funcs():
+            e.phase = "startup"
+        elif info and e.func in info.hot_funcs():
+            e.phase = "hot"
+        else:
+            e.phase = "cold"
+        pulled = closure(edges, [e.dst]) - startup
+        entry = {"script": e.src, "line": e.line, "func": e.func, "resource": e.dst, "phase": e.phase,
+                 "new_files": len(pulled), "new_bytes": _bytes(pulled, sizes)}
+        (lazy_hot if e.phase == "hot" else lazy_other).append(entry)
+    lazy_hot.sort(key=lambda x: -x["new_bytes"])
+    lazy_startup = closure(edges, [e.dst for e in edges if e.phase == "startup"]) - startup
+
+    dynamic = [{"script": info.path, "line": ln, "func": fn, "expr": expr}
+               for info in infos.values() for ln, fn, expr in info.dynamic_loads]
+
+    # Preloads not needed by startup or hot code.
+    preload_candidates: List[Dict] = []
+    for e in edges:
+        if e.kind != "preload" or e.src not in startup:
+            continue
+        info = infos.get(e.src)
+        if info is None:
+            continue
+        used_in = info.uses.get(e.symbol, set()) if e.symbol else {e.func}
+        early = used_in & (info.startup_funcs() | info.hot_funcs())
+        if early:
+            continue
+        saved = startup - closure(edges, roots, skip=e)
+        preload_candidates.append({
+            "script": e.src, "line": e.line, "symbol": e.symbol, "resource": e.dst,
+            "used_in": sorted(used_in), "startup_bytes_saved": _bytes(saved, sizes),
+            "startup_files_saved": len(saved),
+        })
+    preload_candidates.sort(key=lambda x: -x["startup_bytes_saved"])
+
+    by_type: Dict[str, Dict[str, int]] = {}
+    for n in startup:
+        t = by_type.setdefault(_type_of(n), {"files": 0, "bytes": 0})
+        t["files"] += 1
+        t["bytes"] += sizes.get(n, 0)
+
+    return {
+        "roots": [{"kind": e.kind, "resource": e.dst, "name": e.symbol} for e in edges if e.src == PROJECT_NODE],
+        "nodes": {n: {"type": _type_of(n), "bytes": sizes.get(n, 0), "startup": n in startup}
+                  for n in sorted(nodes)},
+        "edges": [asdict(e) for e in edges],
+        "startup": {
+            "files": len(startup),
+            "bytes": _bytes(startup, sizes),
+            "by_type": dict(sorted(by_type.items())),
+            # load() calls that run during _ready()/_init() add to startup on top of the closure.
+            "lazy_files": len(lazy_startup),
+            "lazy_bytes": _bytes(lazy_startup, sizes),
+            "largest": [{"resource": n, "bytes": sizes.get(n, 0)}
+                        for n in sorted(startup, key=lambda n: -sizes.get(n, 0))[:10]],
+        },
+        "lazy_hot": lazy_hot,
+        "lazy_other": lazy_other,
+        "dynamic_loads": dynamic,
+        "preload_not_early": preload_candidates,
+        "missing": missing,
+    }
+
+# --------------------------- DOT ---------------------------------------------
+
+EDGE_STYLE: Dict[str, str] = {
+    "main_scene": 'color="black", penwidth=2',
+    "autoload": 'color="black", penwidth=2',
+    "ext_resource": 'color="gray40"',
+    "preload": 'color="blue"',
+    "extends": 'color="gray60", style="dashed"',
+    "class": 'color="gray60", style="dotted"',
+}
+LOAD_STYLE: Dict[str, str] = {
+    "hot": 'color="red", style="dashed", penwidth=2',
+    "startup": 'color="darkorange", style="dashed"',
+    "cold": 'color="gray50", style="dashed"',
+}
+
+def _dot_id(s: str) -> str:
+    # Backslashes are left alone so labels can use DOT's '\n' line break.
+    return '"' + s.replace('"', '\\"') + '"'
+
+def to_dot(report: Dict) -> str:
+    out = ["digraph load_graph {", "  rankdir=LR;", '  node [shape=box, fontname="Helvetica", fontsize=10];']
+    for n, meta in report["nodes"].items():
+        label = f"{n[len('res://'):] if n.startswith('res://') else n}\\n{meta['bytes'] / 1024.0:.1f} KB"
+        attrs = [f"label={_dot_id(label)}"]
+        if meta["startup"]:
+            attrs.append('style="filled", fillcolor="#cfe8ff"')
+        if n == PROJECT_NODE:
+            attrs.append("shape=doubleoctagon")
+        out.append(f"  {_dot_id(n)} [{', '.join(attrs)}];")
+    for e in report["edges"]:
+        style = LOAD_STYLE.get(e["phase"], LOAD_STYLE["cold"]) if e["kind"] == "load" else EDGE_STYLE[e["kind"]]
+        label = e["func"] if e["kind"] == "load" else ""
+        extra = f", label={_dot_id(label)}, fontsize=8" if label else ""
+        out.append(f"  {_dot_id(e['src'])} -> {_dot_id(e['dst'])} [{style}{extra}];")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+# --------------------------- CLI --------------------------------------------
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description="Resource load graph: startup closure, hot lazy loads, idle preloads")
+    ap.add_argument("path", nargs="?", default=".", help="Project root or any dir inside it (default: .)")
+    ap.add_argument("--out", help="Write the JSON report here instead of stdout")
+    ap.add_argument("--dot", help="Also write a Graphviz DOT graph here")
+    ap.add_argument("--summary", action="store_true", help="Print a short text summary instead of JSON")
+    ap.add_argument("--check", action="store_true", help="Exit 1 if any lazy load runs on a hot path")
+    ap.add_argument("--exclude", action="append", default=list(DEFAULT_EXCLUDES),
+                    help="Dir substrings to skip (repeatable)")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.path):
+        print(f"Not a directory: {args.path}", file=sys.stderr)
+        return 2
+    root = find_project_root(args.path)
+    report = {"commit": git_head(root)}
+    report.update(analyze(root, args.exclude))
+
+    if args.dot:
+        with open(args.dot, "w", encoding="utf-8") as f:
+            f.write(to_dot(report))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(json.dumps(report, indent=2) + "\n")
+    if args.summary or args.out:
+        st = report["startup"]
+        types = ", ".join(f"{t}={v['files']}" for t, v in st["by_type"].items())
+        print(f"Startup closure: {st['files']} files, {st['bytes'] / 1024.0:.1f} KB ({types}); "
+              f"+{st['lazy_files']} files / {st['lazy_bytes'] / 1024.0:.1f} KB loaded from _ready()/_init()")
+        for item in report["lazy_hot"]:
+            print(f"  hot load   {item['script']}:{item['line']} {item['func']}() -> {item['resource']} "
+                  f"(+{item['new_bytes']} B not in startup)")
+        for item in report["dynamic_loads"]:
+            print(f"  dynamic    {item['script']}:{item['line']} {item['func']}() {item['expr']}")
+        for item in report["preload_not_early"]:
+            holder = f" {item['symbol']}" if item["symbol"] else ""
+            print(f"  idle preload{holder} {item['script']}:{item['line']} -> {item['resource']} "
+                  f"(used in: {', '.join(item['used_in']) or 'nothing'}; saves {item['startup_bytes_saved']} B)")
+        for m in report["missing"]:
+            print(f"  missing    {m}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    return 1 if args.check and report["lazy_hot"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
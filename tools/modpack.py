@@ -0,0 +1,853 @@
+#!/usr/bin/env python3
+"""
+modpack.py
+
+Validator and compiler for data-driven mods (weapons, items, upgrades, enemies,
+levels), with a content-addressed bundle for fast hot reload.
+
+Key points:
+- Schemas are inferred from the game, not maintained by hand:
+    weapons / items   ShopDB.WEAPONS / ShopDB.ITEMS entries (scripts/shop.gd)
+    upgrades          UpgradeDB.all() entries; rarities from UpgradeDB.RARITY_WEIGHTS
+    enemies           @export vars of scripts/enemy.gd (plus id/name/tier)
+    levels            _difficulty_params() knobs and difficulty names (scripts/main.gd)
+  A field is required when every base entry has it; numbers that are never negative
+  in the catalogs must not be negative in mods; rarity/kind/type/element are enums.
+- A mod is a folder with mod.json ({"id", "name", "version"}) and any number of
+  .json data files of the form {"weapons": [...], "items": [...], ...}. Colors are
+  [r, g, b(, a)] or "#rrggbb(aa)".
+- Compiles to a versioned binary bundle (.dxpk): each entry is stored as
+  canonical JSON without its id (identical payloads only once); a sorted index maps (category, id) to a short content hash
+  (the first 8 bytes of the payload's SHA-256) plus offset/length. The JSON
+  manifest written next to it carries the full digests.
+- '--previous OLD' diffs manifests so a hot reload only re-imports added/changed
+  entries (OLD may be the bundle being rebuilt); '--bench' compares loose-file vs
+  compiled-bundle load times for 1k..100k entries; '--self-test' checks the
+  compile/reload round trip.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_source import DICT_NUM, DIFFICULTY_ENUM, DIFFICULTY_RETURN, function_body  # noqa: E402
+from read_ahead import read_ahead, walk_files  # noqa: E402
+from tscn_format import find_project_root  # noqa: E402
+
+# --------------------------- Format ------------------------------------------
+
+BUNDLE_MAGIC = b"DXPK"
+BUNDLE_VERSION = 2
+# magic, version, flags, entry count, index offset, index length, schema id, index sha256
+HEADER = struct.Struct("<4sHHIQI8s32s")
+INDEX_KEY = struct.Struct("<BB")        # category code, id length (id bytes follow)
+INDEX_REF = struct.Struct("<8sII")      # short payload hash, offset, length
+SHORT_HASH = 8                          # bytes of SHA-256 kept in the index
+MAX_BUNDLE_BYTES = 0xFFFFFFFF           # offsets are u32
+
+CATEGORIES: Tuple[str, ...] = ("mod", "weapon", "item", "upgrade", "enemy", "level")
+PLURALS: Dict[str, str] = {"weapons": "weapon", "items": "item", "upgrades": "upgrade",
+                           "enemies": "enemy", "levels": "level"}
+META_ID = "_meta"
+
+ID_RE = re.compile(r"^[a-z][a-z0-9_]{0,63}$")
+HEX_COLOR = re.compile(r"^#(?:[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+
+# Enemy scenes that ship with the game; levels may reference them by id.
+BASE_ENEMY_IDS: Tuple[str, ...] = ("enemy", "boss")
+ENUM_FIELDS: Tuple[str, ...] = ("kind", "rarity", "type", "element", "stack.type")
+
+BENCH_SIZES: Tuple[int, ...] = (1000, 10000, 100000)
+
+# --------------------------- GDScript literals --------------------------------
+
+class GdCall(NamedTuple):
+    name: str            # e.g. 'Color'
+    args: List[Any]
+
+NUMBER = re.compile(r"-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?")
+IDENT = re.compile(r"[A-Za-z_]\w*")
+
+class _LiteralParser:
+    """Reads one GDScript constant expression ([...], {...}, strings, numbers, Type(...))."""
+
+    def __init__(self, text: str, pos: int) -> None:
+        self.text = text
+        self.pos = pos
+
+    def _ws(self) -> None:
+        while self.pos < len(self.text):
+            c = self.text[self.pos]
+            if c.isspace():
+                self.pos += 1
+            elif c == "#":
+                nl = self.text.find("\n", self.pos)
+                self.pos = len(self.text) if nl < 0 else nl + 1
+            else:
+                return
+
+    def _expect(self, ch: str) -> None:
+        self._ws()
+        if self.text[self.pos:self.pos + 1] != ch:
+            raise ValueError(f"expected '{ch}' at offset {self.pos}")
+        self.pos += 1
+
+    def _peek(self) -> str:
+        self._ws()
+        return self.text[self.pos:self.pos + 1]
+
+    def _items(self, close: str) -> List[Any]:
+        items: List[Any] = []
+        while self._peek() != close:
+            items.append(self.value())
+            if self._peek() == ",":
+                self.pos += 1
+        self.pos += 1
+        return items
+
+    def value(self) -> Any:
+        c = self._peek()
+        if c in "\"'":
+            end = self.pos + 1
+            while self.text[end] != c:
+                end += 2 if self.text[end] == "\\" else 1
+            raw = self.text[self.pos + 1:end]
+            self.pos = end + 1
+            return raw.replace('\\"', '"').replace("\\'", "'").replace("\\n", "\n").replace("\\\\", "\\")
+        if c == "[":
+            self.pos += 1
+            return self._items("]")
+        if c == "{":
+            self.pos += 1
+            out: Dict[str, Any] = {}
+            while self._peek() != "}":
+                key = self.value()
+                self._expect(":")
+                out[str(key)] = self.value()
+                if self._peek() == ",":
+                    self.pos += 1
+            self.pos += 1
+            return out
+        m = NUMBER.match(self.text, self.pos)
+        if m:
+            self.pos = m.end()
+            raw = m.group(0)
+            return float(raw) if any(ch in raw for ch in ".eE") else int(raw)
+        m = IDENT.match(self.text, self.pos)
+        if m:
+            self.pos = m.end()
+            word = m.group(0)
+            if word in ("true", "false"):
+                return word == "true"
+            if word == "null":
+                return None
+            self._expect("(")
+            return GdCall(word, self._items(")"))
+        raise ValueError(f"unexpected {c!r} at offset {self.pos}")
+
+def gd_literal_after(text: str, anchor: str) -> Any:
+    """Parse the literal that follows the first match of regex 'anchor'."""
+    m = re.search(anchor, text, re.M)
+    if not m:
+        raise ValueError(f"'{anchor}' not found")
+    return _LiteralParser(text, m.end()).value()
+
+# --------------------------- Schemas -----------------------------------------
+
+@dataclass
+class FieldSpec:
+    types: Tuple[str, ...]                     # int, float, string, bool, Color, Array, Dictionary
+    required: bool = False
+    enum: Tuple[str, ...] = ()
+    minimum: Optional[float] = None
+    fields: Dict[str, "FieldSpec"] = field(default_factory=dict)   # nested Dictionary schema
+    ref: str = ""                              # Array of ids from this category
+
+    def to_json(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"types": list(self.types), "required": self.required}
+        if self.enum:
+            out["enum"] = list(self.enum)
+        if self.minimum is not None:
+            out["minimum"] = self.minimum
+        if self.fields:
+            out["fields"] = {k: v.to_json() for k, v in self.fields.items()}
+        if self.ref:
+            out["ref"] = self.ref
+        return out
+
+def type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, GdCall):
+        return value.name
+    if isinstance(value, list):
+        return "Array"
+    if isinstance(value, dict):
+        return "Dictionary"
+    return "null"
+
+def infer_fields(samples: Sequence[Dict[str, Any]], enums: Dict[str, Sequence[str]],
+                 prefix: str = "") -> Dict[str, FieldSpec]:
+    """Field specs covering every key seen in 'samples' (base catalog entries)."""
+    keys: List[str] = []
+    for s in samples:
+        keys.extend(k for k in s if k not in keys)
+    specs: Dict[str, FieldSpec] = {}
+    for key in keys:
+        values = [s[key] for s in samples if key in s]
+        types = sorted({type_name(v) for v in values})
+        if "float" in types and "int" in types:
+            types.remove("int")
+        spec = FieldSpec(types=tuple(types), required=len(values) == len(samples))
+        numbers = [v for v in values if type_name(v) in ("int", "float")]
+        if numbers and all(v >= 0 for v in numbers):
+            spec.minimum = 0
+        path = prefix + key
+        if path in enums:
+            spec.enum = tuple(enums[path])
+        elif path.rsplit(".", 1)[-1] in ENUM_FIELDS or path in ENUM_FIELDS:
+            spec.enum = tuple(sorted({v for v in values if isinstance(v, str)}))
+        if "Dictionary" in types:
+            spec.fields = infer_fields([v for v in values if isinstance(v, dict)], enums, path + ".")
+        specs[key] = spec
+    return specs
+
+def _read(root: str, rel: str) -> str:
+    with open(os.path.join(root, rel), "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+EXPORT_VAR = re.compile(r"^@export\s+var\s+(?P<name>\w+)\s*:\s*(?P<type>\w+)\s*=", re.M)
+GD_TYPES: Dict[str, str] = {"int": "int", "float": "float", "String": "string", "bool": "bool"}
+
+def build_schemas(project_root: str) -> Dict[str, Dict[str, FieldSpec]]:
+    shop = _read(project_root, "scripts/shop.gd")
+    upgrades = _read(project_root, "scripts/upgrades.gd")
+    enemy = _read(project_root, "scripts/enemy.gd")
+    main = _read(project_root, "scripts/main.gd")
+
+    rarities = list(gd_literal_after(upgrades, r"const\s+RARITY_WEIGHTS\b[^=]*=\s*").keys())
+    enums = {"rarity": rarities}
+    schemas: Dict[str, Dict[str, FieldSpec]] = {
+        "weapon": infer_fields(gd_literal_after(shop, r"const\s+WEAPONS\b[^=]*=\s*"), enums),
+        "item": infer_fields(gd_literal_after(shop, r"const\s+ITEMS\b[^=]*=\s*"), enums),
+        "upgrade": infer_fields(gd_literal_after(upgrades, r"static\s+func\s+all\(\)[^:]*:\s*return\s*"), enums),
+    }
+
+    enemy_fields: Dict[str, FieldSpec] = {
+        "id": FieldSpec(("string",), required=True),
+        "name": FieldSpec(("string",)),
+        "tier": FieldSpec(("int",), minimum=1),
+    }
+    for m in EXPORT_VAR.finditer(enemy):
+        if m.group("type") in GD_TYPES:
+            kind = GD_TYPES[m.group("type")]
+            enemy_fields[m.group("name")] = FieldSpec((kind,), minimum=0 if kind in ("int", "float") else None)
+    schemas["enemy"] = enemy_fields
+
+    body = function_body(main, "_difficulty_params")
+    params = [{d.group("key"): _number(d.group("value")) for d in DICT_NUM.finditer(m.group("body"))}
+              for m in DIFFICULTY_RETURN.finditer(body)]
+    em = DIFFICULTY_ENUM.search(main)
+    difficulties = re.findall(r'"(\w+)"', em.group("names")) if em else []
+    level_fields: Dict[str, FieldSpec] = {
+        "id": FieldSpec(("string",), required=True),
+        "name": FieldSpec(("string",), required=True),
+        "waves": FieldSpec(("int",), required=True, minimum=1),
+        "difficulty": FieldSpec(("string",), enum=tuple(difficulties)),
+        "enemies": FieldSpec(("Array",), ref="enemy"),
+    }
+    for key, spec in infer_fields(params, {}).items():
+        spec.required = False
+        level_fields[key] = spec
+    schemas["level"] = level_fields
+    return schemas
+
+def _number(raw: str) -> Any:
+    return float(raw) if "." in raw else int(raw)
+
+def schema_id(schemas: Dict[str, Dict[str, FieldSpec]]) -> bytes:
+    """8-byte fingerprint stored in bundles; changes whenever the game's schemas do."""
+    blob = json.dumps({c: {k: v.to_json() for k, v in s.items()} for c, s in schemas.items()}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).digest()[:8]
+
+def base_ids(project_root: str) -> Dict[str, set]:
+    """Ids already defined by the game; mod entries with these ids override them."""
+    shop = _read(project_root, "scripts/shop.gd")
+    upgrades = _read(project_root, "scripts/upgrades.gd")
+    return {
+        "weapon": {e["id"] for e in gd_literal_after(shop, r"const\s+WEAPONS\b[^=]*=\s*")},
+        "item": {e["id"] for e in gd_literal_after(shop, r"const\s+ITEMS\b[^=]*=\s*")},
+        "upgrade": {e["id"] for e in gd_literal_after(upgrades, r"static\s+func\s+all\(\)[^:]*:\s*return\s*")},
+        "enemy": set(BASE_ENEMY_IDS),
+        "level": set(),
+    }
+
+# --------------------------- Validation --------------------------------------
+
+class Issue(NamedTuple):
+    source: str
+    category: str
+    entry_id: str
+    message: str
+    level: str = "error"      # error | warning
+
+    def format(self) -> str:
+        where = f"{self.category}:{self.entry_id}" if self.entry_id else self.category
+        return f"{self.source}: {self.level}: {where}: {self.message}"
+
+def _color(value: Any) -> Optional[List[float]]:
+    if isinstance(value, str) and HEX_COLOR.match(value):
+        h = value[1:]
+        rgba = [int(h[i:i + 2], 16) / 255.0 for i in range(0, len(h), 2)]
+        return [round(c, 6) for c in (rgba + [1.0])[:4]]
+    if (isinstance(value, list) and len(value) in (3, 4)
+            and all(type_name(c) in ("int", "float") for c in value)):
+        return [float(c) for c in (list(value) + [1.0])[:4]]
+    return None
+
+def check_value(spec: FieldSpec, value: Any, path: str, allow_extra: bool) -> Tuple[Any, List[Tuple[str, str]]]:
+    """(normalized value, [(level, message)]) for one field."""
+    problems: List[Tuple[str, str]] = []
+    kind = type_name(value)
+    ok = kind in spec.types or (kind == "int" and "float" in spec.types)
+    if "Color" in spec.types and not ok:
+        color = _color(value)
+        if color is not None:
+            return color, problems
+    if not ok:
+        return value, [("error", f"{path}: expected {'/'.join(spec.types)}, got {kind}")]
+    if spec.enum and value not in spec.enum:
+        problems.append(("error", f"{path}: {value!r} is not one of {', '.join(spec.enum)}"))
+    if spec.minimum is not None and kind in ("int", "float") and value < spec.minimum:
+        problems.append(("error", f"{path}: {value} is below {spec.minimum}"))
+    if kind == "Dictionary" and spec.fields:
+        value, nested = check_fields(spec.fields, value, path + ".", allow_extra)
+        problems.extend(nested)
+    if kind == "Array" and spec.ref and not all(isinstance(v, str) for v in value):
+        problems.append(("error", f"{path}: expected a list of {spec.ref} ids"))
+    return value, problems
+
+def check_fields(fields: Dict[str, FieldSpec], entry: Dict[str, Any], prefix: str,
+                 allow_extra: bool) -> Tuple[Dict[str, Any], List[Tuple[str, str]]]:
+    problems: List[Tuple[str, str]] = []
+    out: Dict[str, Any] = {}
+    for key, spec in fields.items():
+        if key not in entry:
+            if spec.required:
+                problems.append(("error", f"{prefix}{key}: missing required field"))
+            continue
+        out[key], found = check_value(spec, entry[key], prefix + key, allow_extra)
+        problems.extend(found)
+    for key in entry:
+        if key not in fields:
+            problems.append(("warning" if allow_extra else "error", f"{prefix}{key}: unknown field"))
+            out[key] = entry[key]
+    return out, problems
+
+@dataclass
+class ModData:
+    meta: Dict[str, Any]
+    entries: Dict[Tuple[str, str], Dict[str, Any]]       # (category, id) -> normalized entry
+    sources: Dict[Tuple[str, str], str]
+    issues: List[Issue]
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [i for i in self.issues if i.level == "error"]
+
+def validate_documents(docs: Iterable[Tuple[str, Any]], schemas: Dict[str, Dict[str, FieldSpec]],
+                       known: Dict[str, set], allow_extra: bool = False) -> ModData:
+    """Validate parsed (source, json) documents; 'mod.json' supplies the mod metadata."""
+    data = ModData(meta={}, entries={}, sources={}, issues=[])
+    for source, doc in docs:
+        if os.path.basename(source) == "mod.json":
+            if not isinstance(doc, dict) or any(not isinstance(doc.get(k), str) for k in ("id", "name", "version")):
+                data.issues.append(Issue(source, "mod", "", "mod.json needs string 'id', 'name' and 'version'"))
+            else:
+                data.meta = doc
+            continue
+        if not isinstance(doc, dict):
+            data.issues.append(Issue(source, "file", "", "expected an object of {category: [entries]}"))
+            continue
+        for plural, entries in doc.items():
+            category = PLURALS.get(plural)
+            if category is None:
+                data.issues.append(Issue(source, plural, "", f"unknown category (use {', '.join(PLURALS)})"))
+                continue
+            if not isinstance(entries, list):
+                data.issues.append(Issue(source, category, "", "expected a list of entries"))
+                continue
+            for entry in entries:
+                entry_id = entry.get("id") if isinstance(entry, dict) else None
+                if not isinstance(entry_id, str) or not ID_RE.match(entry_id):
+                    data.issues.append(Issue(source, category, str(entry_id or ""),
+                                             "entry needs an 'id' of up to 64 lowercase letters, digits and '_'"))
+                    continue
+                key = (category, entry_id)
+                if key in data.entries:
+                    data.issues.append(Issue(source, category, entry_id,
+                                             f"duplicate id (first defined in {data.sources[key]})"))
+                    continue
+                normalized, problems = check_fields(schemas[category], entry, "", allow_extra)
+                for level, msg in problems:
+                    data.issues.append(Issue(source, category, entry_id, msg, level))
+                data.entries[key] = normalized
+                data.sources[key] = source
+                if entry_id in known.get(category, ()):
+                    data.issues.append(Issue(source, category, entry_id, "overrides the base game entry", "warning"))
+
+    if not data.meta:
+        data.issues.append(Issue("mod.json", "mod", "", "missing mod.json"))
+    enemy_ids = set(known.get("enemy", ())) | {i for c, i in data.entries if c == "enemy"}
+    for (category, entry_id), entry in data.entries.items():
+        for key, spec in schemas[category].items():
+            if spec.ref and isinstance(entry.get(key), list):
+                pool = enemy_ids if spec.ref == "enemy" else {i for c, i in data.entries if c == spec.ref}
+                for ref in entry[key]:
+                    if isinstance(ref, str) and ref not in pool:
+                        data.issues.append(Issue(data.sources[(category, entry_id)], category, entry_id,
+                                                 f"{key}: unknown {spec.ref} id {ref!r}"))
+    return data
+
+def load_loose(mod_dir: str) -> Iterable[Tuple[str, Any, Optional[str]]]:
+    """(path, parsed JSON, error) for every .json under 'mod_dir', read ahead in sorted order.
+
+    'error' is None on success; otherwise the document is None and 'error' says why.
+    """
+    for fp, raw, err in read_ahead(walk_files(mod_dir, accept=lambda f: f.endswith(".json"))):
+        if err is not None or raw is None:
+            yield fp, None, f"read failed: {err}" if err is not None else "read failed"
+            continue
+        try:
+            yield fp, json.loads(raw.decode("utf-8-sig")), None
+        except ValueError as exc:
+            yield fp, None, str(exc)
+
+def validate_mod(mod_dir: str, schemas: Dict[str, Dict[str, FieldSpec]], known: Dict[str, set],
+                 allow_extra: bool = False) -> ModData:
+    docs: List[Tuple[str, Any]] = []
+    issues: List[Issue] = []
+    for fp, doc, error in load_loose(mod_dir):
+        rel = os.path.relpath(fp, mod_dir).replace("\\", "/")
+        if error is not None:
+            issues.append(Issue(rel, "file", "", f"unreadable JSON: {error}"))
+            continue
+        docs.append((rel, doc))
+    data = validate_documents(docs, schemas, known, allow_extra)
+    data.issues[:0] = issues
+    return data
+
+# --------------------------- Bundle ------------------------------------------
+
+def canonical(entry: Dict[str, Any]) -> bytes:
+    return json.dumps(entry, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def build_bundle(data: ModData, sid: bytes) -> Tuple[bytes, Dict[str, Any]]:
+    """(bundle bytes, manifest). Identical payloads are stored once."""
+    items = [(("mod", META_ID), data.meta)] + sorted(data.entries.items())
+    blobs = bytearray()
+    offsets: Dict[bytes, Tuple[int, int]] = {}
+    index = bytearray()
+    manifest_entries: Dict[str, str] = {}
+    for (category, entry_id), entry in items:
+        # The id lives in the index; leaving it out of the payload lets equal entries share one blob.
+        payload = canonical(entry if category == "mod" else {k: v for k, v in entry.items() if k != "id"})
+        digest = hashlib.sha256(payload).digest()
+        if digest not in offsets:
+            # Check before packing: INDEX_REF would fail with a bare struct.error.
+            if HEADER.size + len(blobs) + len(payload) > MAX_BUNDLE_BYTES:
+                raise ValueError(f"bundle payloads exceed {MAX_BUNDLE_BYTES} bytes; split the mod")
+            offsets[digest] = (HEADER.size + len(blobs), len(payload))
+            blobs += payload
+        offset, length = offsets[digest]
+        key = entry_id.encode("utf-8")
+        index += INDEX_KEY.pack(CATEGORIES.index(category), len(key)) + key
+        index += INDEX_REF.pack(digest[:SHORT_HASH], offset, length)
+        manifest_entries[f"{category}/{entry_id}"] = digest.hex()
+    index_offset = HEADER.size + len(blobs)
+    # The header stores len(index) as u32; keep the whole file within the same limit.
+    if index_offset + len(index) > MAX_BUNDLE_BYTES:
+        raise ValueError(f"bundle exceeds {MAX_BUNDLE_BYTES} bytes; split the mod")
+    index_hash = hashlib.sha256(bytes(index)).digest()
+    header = HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0, len(items), index_offset, len(index), sid, index_hash)
+    manifest = {
+        "format": BUNDLE_VERSION,
+        "schema": sid.hex(),
+        "mod": data.meta,
+        "bundle": index_hash.hex(),
+        "entries": manifest_entries,
+    }
+    return header + bytes(blobs) + bytes(index), manifest
+
+class BundleEntry(NamedTuple):
+    category: str
+    entry_id: str
+    digest: bytes          # first SHORT_HASH bytes of the payload's SHA-256
+    offset: int
+    length: int
+
+@dataclass
+class Bundle:
+    path: str
+    version: int
+    schema: bytes
+    digest: bytes
+    entries: Dict[Tuple[str, str], BundleEntry]
+
+    def manifest(self) -> Dict[str, str]:
+        return {f"{c}/{i}": e.digest.hex() for (c, i), e in self.entries.items()}
+
+    def load(self, keys: Optional[Iterable[Tuple[str, str]]] = None, verify: bool = False) -> Dict[Tuple[str, str], Any]:
+        """Decode entries (all, or only 'keys'); 'verify' re-hashes each payload."""
+        wanted = list(self.entries) if keys is None else list(keys)
+        out: Dict[Tuple[str, str], Any] = {}
+        with open(self.path, "rb") as f:
+            for key in sorted(wanted, key=lambda k: self.entries[k].offset):
+                e = self.entries[key]
+                f.seek(e.offset)
+                payload = f.read(e.length)
+                if verify and hashlib.sha256(payload).digest()[:SHORT_HASH] != e.digest:
+                    raise ValueError(f"{self.path}: payload hash mismatch for {key[0]}/{key[1]}")
+                value = json.loads(payload)
+                if key[0] != "mod":
+                    value["id"] = key[1]
+                out[key] = value
+        return out
+
+def read_bundle(path: str) -> Bundle:
+    """Read a bundle's header and index (payloads stay on disk until load())."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path}: truncated bundle")
+        magic, version, _flags, count, index_offset, index_len, sid, index_hash = HEADER.unpack(header)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"{path}: not a mod bundle")
+        if version != BUNDLE_VERSION:
+            raise ValueError(f"{path}: bundle format {version}, this tool reads {BUNDLE_VERSION}")
+        f.seek(index_offset)
+        index = f.read(index_len)
+    if hashlib.sha256(index).digest() != index_hash:
+        raise ValueError(f"{path}: index checksum mismatch")
+    entries: Dict[Tuple[str, str], BundleEntry] = {}
+    pos = 0
+    for _ in range(count):
+        cat, id_len = INDEX_KEY.unpack_from(index, pos)
+        pos += INDEX_KEY.size
+        entry_id = index[pos:pos + id_len].decode("utf-8")
+        pos += id_len
+        digest, offset, length = INDEX_REF.unpack_from(index, pos)
+        pos += INDEX_REF.size
+        entries[(CATEGORIES[cat], entry_id)] = BundleEntry(CATEGORIES[cat], entry_id, digest, offset, length)
+    return Bundle(path, version, sid, index_hash, entries)
+
+def load_manifest(path: str) -> Dict[str, str]:
+    """Entry hashes from a .manifest.json (full digests) or a bundle (short hashes)."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return dict(json.load(f).get("entries", {}))
+    return read_bundle(path).manifest()
+
+def _same_hash(a: str, b: str) -> bool:
+    # A bundle's index holds short hashes, a manifest full ones; compare the common prefix.
+    n = min(len(a), len(b))
+    return a[:n] == b[:n]
+
+def reload_plan(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, List[str]]:
+    """What a hot reload has to re-import (added/changed) or drop (removed)."""
+    return {
+        "added": sorted(k for k in new if k not in old),
+        "changed": sorted(k for k in new if k in old and not _same_hash(old[k], new[k])),
+        "removed": sorted(k for k in old if k not in new),
+        "unchanged": sorted(k for k in new if k in old and _same_hash(old[k], new[k])),
+    }
+
+def write_bundle(data: ModData, sid: bytes, out: str) -> Dict[str, Any]:
+    blob, manifest = build_bundle(data, sid)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, out)
+    with open(out + ".manifest.json", "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
+
+# --------------------------- Benchmark ---------------------------------------
+
+def _synthetic_docs(project_root: str, n: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """n valid entries cloned from the base catalogs, one per loose file."""
+    shop = _read(project_root, "scripts/shop.gd")
+    upgrades = _read(project_root, "scripts/upgrades.gd")
+    pools = [
+        ("weapons", gd_literal_after(shop, r"const\s+WEAPONS\b[^=]*=\s*")),
+        ("items", gd_literal_after(shop, r"const\s+ITEMS\b[^=]*=\s*")),
+        ("upgrades", gd_literal_after(upgrades, r"static\s+func\s+all\(\)[^:]*:\s*return\s*")),
+    ]
+    docs: List[Tuple[str, Dict[str, Any]]] = []
+    for i in range(n):
+        plural, pool = pools[i % len(pools)]
+        base = pool[(i // len(pools)) % len(pool)]
+        entry = {k: (_color([c for c in v.args]) if isinstance(v, GdCall) else v) for k, v in base.items()}
+        entry["id"] = f"{base['id']}_{i}"
+        entry["name"] = f"{base['name']} {i}"
+        docs.append((f"data/{plural}/{entry['id']}.json", {plural: [entry]}))
+    return docs
+
+def benchmark(project_root: str, sizes: Sequence[int], changed_fraction: float = 0.01) -> List[Dict[str, Any]]:
+    schemas = build_schemas(project_root)
+    known = {c: set() for c in CATEGORIES}
+    sid = schema_id(schemas)
+    meta = {"id": "bench", "name": "Benchmark", "version": "1.0.0"}
+    rows: List[Dict[str, Any]] = []
+    for n in sizes:
+        work = tempfile.mkdtemp(prefix="modpack_bench_")
+        try:
+            mod_dir = os.path.join(work, "mod")
+            docs = [("mod.json", meta)] + _synthetic_docs(project_root, n)
+            for rel, doc in docs:
+                fp = os.path.join(mod_dir, rel)
+                os.makedirs(os.path.dirname(fp), exist_ok=True)
+                with open(fp, "w", encoding="utf-8") as f:
+                    json.dump(doc, f)
+
+            t0 = time.perf_counter()
+            parsed = list(load_loose(mod_dir))
+            t_parse = time.perf_counter() - t0
+            failed = [(fp, error) for fp, _, error in parsed if error is not None]
+            if failed:
+                raise RuntimeError(f"synthetic mod unreadable: {failed[0][0]}: {failed[0][1]}")
+            data = validate_documents([(os.path.relpath(fp, mod_dir), d) for fp, d, _ in parsed], schemas, known)
+            t_loose = time.perf_counter() - t0
+            if data.errors:
+                raise RuntimeError(f"synthetic mod failed validation: {data.errors[0].format()}")
+
+            out = os.path.join(work, "bench.dxpk")
+            t0 = time.perf_counter()
+            old_manifest = write_bundle(data, sid, out)
+            t_build = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            loaded = read_bundle(out).load()
+            t_compiled = time.perf_counter() - t0
+            assert len(loaded) == n + 1
+
+            # Hot reload: edit a slice of entries, rebuild, re-import only what changed.
+            step = max(1, int(round(1.0 / changed_fraction)))
+            for k, (key, entry) in enumerate(sorted(data.entries.items())):
+                if k % step == 0:
+                    entry["name"] += " (edited)"
+            new_manifest = write_bundle(data, sid, out)
+            t0 = time.perf_counter()
+            bundle = read_bundle(out)
+            plan = reload_plan(old_manifest["entries"], bundle.manifest())
+            keys = [tuple(k.split("/", 1)) for k in plan["added"] + plan["changed"]]
+            bundle.load(keys)
+            t_reload = time.perf_counter() - t0
+            assert not reload_plan(new_manifest["entries"], bundle.manifest())["changed"]
+
+            rows.append({
+                "entries": n,
+                "loose_files": len(docs),
+                "loose_bytes": sum(os.path.getsize(os.path.join(mod_dir, rel)) for rel, _ in docs),
+                "bundle_bytes": os.path.getsize(out),
+                "loose_parse_s": round(t_parse, 4),
+                "loose_parse_validate_s": round(t_loose, 4),
+                "compile_s": round(t_build, 4),
+                "compiled_load_s": round(t_compiled, 4),
+                "hot_reload_entries": len(keys),
+                "hot_reload_s": round(t_reload, 4),
+                "speedup": round(t_loose / t_compiled, 1) if t_compiled > 0 else None,
+            })
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+    return rows
+
+# --------------------------- Self-test ---------------------------------------
+
+SELF_TEST_MOD: Dict[str, Any] = {
+    "enemies": [{"id": "yeti", "name": "Yeti", "tier": 2, "move_speed": 90.0, "max_health": 60, "contact_damage": 15}],
+    "levels": [{"id": "glacier", "name": "Glacier", "waves": 20, "difficulty": "Hard", "enemies": ["yeti", "boss"]}],
+    "items": [{"kind": "item", "id": "scarf", "name": "Scarf", "cost": 5, "rarity": "Common", "desc": "Warm."}],
+}
+
+def self_test(project_root: str) -> Tuple[int, List[str]]:
+    """(checks run, failures) for a small mod compiled through main(), including in-place hot reloads."""
+    failures: List[str] = []
+    checks = 0
+    work = tempfile.mkdtemp(prefix="modpack_selftest_")
+    try:
+        mod_dir = os.path.join(work, "mod")
+        out = os.path.join(work, "out", "m.dxpk")
+        os.makedirs(mod_dir)
+        with open(os.path.join(mod_dir, "mod.json"), "w", encoding="utf-8") as f:
+            json.dump({"id": "self_test", "name": "Self Test", "version": "1.0.0"}, f)
+        doc = json.loads(json.dumps(SELF_TEST_MOD))
+
+        def build(*extra: str) -> Tuple[int, Dict[str, Any]]:
+            with open(os.path.join(mod_dir, "data.json"), "w", encoding="utf-8") as f:
+                json.dump(doc, f)
+            buf = io.StringIO()
+            with contextlib.redirect_stdout(buf):
+                rc = main([mod_dir, "--project", project_root, "--out", out, "--json", *extra])
+            return rc, json.loads(buf.getvalue())
+
+        def expect(label: str, got: Any, want: Any) -> None:
+            nonlocal checks
+            checks += 1
+            if got != want:
+                failures.append(f"{label}: expected {want!r}, got {got!r}")
+
+        rc, _ = build()
+        expect("first build exit code", rc, 0)
+        loaded = read_bundle(out).load(verify=True)
+        expect("round trip", loaded[("enemy", "yeti")], SELF_TEST_MOD["enemies"][0])
+
+        # In-place rebuilds: --previous points at the files --out is about to replace.
+        for previous in (out + ".manifest.json", out):
+            doc["enemies"][0]["tier"] += 1
+            rc, result = build("--previous", previous)
+            expect(f"rebuild vs {os.path.basename(previous)}: changed", result.get("reload", {}).get("changed"),
+                   ["enemy/yeti"])
+            expect(f"rebuild vs {os.path.basename(previous)}: unchanged", result.get("reload", {}).get("unchanged"), 3)
+
+        doc["items"].append(dict(doc["items"][0], id="mittens", name="Mittens"))
+        del doc["levels"]
+        rc, result = build("--previous", out + ".manifest.json")
+        reload = result.get("reload", {})
+        expect("added/removed", (reload.get("added"), reload.get("removed")), (["item/mittens"], ["level/glacier"]))
+
+        doc["items"][0]["rarity"] = "Mythic"
+        rc, result = build()
+        expect("invalid mod exit code", rc, 1)
+        expect("invalid mod leaves the bundle alone", "bundle" in result, False)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return checks, failures
+
+# --------------------------- CLI --------------------------------------------
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description="Validate and compile data-driven mods into content-addressed bundles")
+    ap.add_argument("mod", nargs="?", help="Mod folder (mod.json + *.json data files)")
+    ap.add_argument("--project", default=".", help="Game project root or any dir inside it (default: .)")
+    ap.add_argument("--out", help="Compile to this bundle (.dxpk); a .manifest.json is written next to it")
+    ap.add_argument("--previous", help="Previous bundle or manifest: print the hot-reload plan against it")
+    ap.add_argument("--allow-extra", action="store_true", help="Unknown fields are warnings instead of errors")
+    ap.add_argument("--schema", action="store_true", help="Print the inferred schemas as JSON and exit")
+    ap.add_argument("--bench", action="store_true", help="Benchmark loose vs compiled loading and exit")
+    ap.add_argument("--bench-sizes", default=",".join(str(n) for n in BENCH_SIZES),
+                    help="Comma-separated entry counts for --bench (default: 1000,10000,100000)")
+    ap.add_argument("--json", action="store_true", help="Machine-readable output")
+    ap.add_argument("--self-test", action="store_true", help="Compile a built-in mod and check bundle/hot-reload round trips")
+    args = ap.parse_args(argv)
+
+    root = find_project_root(args.project)
+    try:
+        schemas = build_schemas(root)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read the game catalogs under {root}: {e}", file=sys.stderr)
+        return 2
+
+    if args.schema:
+        print(json.dumps({"schema": schema_id(schemas).hex(),
+                          "categories": {c: {k: v.to_json() for k, v in s.items()} for c, s in schemas.items()}},
+                         indent=2))
+        return 0
+
+    if args.self_test:
+        checks, failures = self_test(root)
+        for f in failures:
+            print(f"FAIL {f}")
+        print(f"{'FAILED' if failures else 'OK'}: {checks - len(failures)}/{checks} checks")
+        return 1 if failures else 0
+
+    if args.bench:
+        try:
+            sizes = [int(s) for s in args.bench_sizes.split(",") if s.strip()]
+        except ValueError:
+            print(f"--bench-sizes expects integers, got: {args.bench_sizes}", file=sys.stderr)
+            return 2
+        rows = benchmark(root, sizes)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print(f"{'entries':>8} {'loose s':>9} {'+valid s':>9} {'bundle s':>9} {'speedup':>8} "
+                  f"{'reload n':>9} {'reload s':>9} {'loose KB':>9} {'bundle KB':>10}")
+            for r in rows:
+                print(f"{r['entries']:>8} {r['loose_parse_s']:>9.3f} {r['loose_parse_validate_s']:>9.3f} "
+                      f"{r['compiled_load_s']:>9.3f} {r['speedup']:>7}x {r['hot_reload_entries']:>9} "
+                      f"{r['hot_reload_s']:>9.3f} {r['loose_bytes'] / 1024:>9.0f} {r['bundle_bytes'] / 1024:>10.0f}")
+        return 0
+
+    if not args.mod or not os.path.isdir(args.mod):
+        print(f"Not a mod folder: {args.mod}", file=sys.stderr)
+        return 2
+
+    previous: Optional[Dict[str, str]] = None
+    if args.previous:
+        # Read it before writing: --previous may be the --out bundle or its own manifest.
+        try:
+            previous = load_manifest(args.previous)
+        except (OSError, ValueError) as e:
+            print(f"Cannot read previous bundle/manifest {args.previous}: {e}", file=sys.stderr)
+            return 2
+
+    data = validate_mod(args.mod, schemas, base_ids(root), args.allow_extra)
+    result: Dict[str, Any] = {
+        "mod": data.meta,
+        "entries": len(data.entries),
+        "issues": [i._asdict() for i in data.issues],
+    }
+    if not data.errors and args.out:
+        manifest = write_bundle(data, schema_id(schemas), args.out)
+        result["bundle"] = {"path": args.out, "bytes": os.path.getsize(args.out), "hash": manifest["bundle"]}
+        if previous is not None:
+            plan = reload_plan(previous, manifest["entries"])
+            result["reload"] = {k: v for k, v in plan.items() if k != "unchanged"}
+            result["reload"]["unchanged"] = len(plan["unchanged"])
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for issue in data.issues:
+            print(issue.format())
+        counts: Dict[str, int] = {}
+        for category, _ in data.entries:
+            counts[category] = counts.get(category, 0) + 1
+        print(f"{data.meta.get('id', '?')}: {len(data.entries)} entries "
+              f"({', '.join(f'{c}={n}' for c, n in sorted(counts.items())) or 'none'}), "
+              f"{len(data.errors)} error(s)")
+        if "bundle" in result:
+            print(f"Wrote {args.out} ({result['bundle']['bytes']} bytes, {result['bundle']['hash'][:12]})")
+        if "reload" in result:
+            r = result["reload"]
+            print(f"Hot reload: {len(r['added'])} added, {len(r['changed'])} changed, "
+                  f"{len(r['removed'])} removed, {r['unchanged']} unchanged")
+            for k in r["added"] + r["changed"]:
+                print(f"  reimport {k}")
+    return 1 if data.errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
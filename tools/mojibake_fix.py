@@ -1,7 +1,13 @@
+import os
+import sys
 import pathlib
 import argparse
 import fnmatch
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from read_ahead import DEFAULT_JOBS, DEFAULT_MAX_BYTES, read_ahead, walk_files  # noqa: E402
+
 # Map of mojibake -> proper character
 REPLACEMENTS = {
     "â€“": "–",   # en dash
@@ -16,12 +22,10 @@ REPLACEMENTS = {
 
 DEFAULT_EXCLUDED_DIRS = {".git", ".hg", ".svn", ".venv", "venv", "node_modules", "dist", "build", "__pycache__"}
 
-def is_text_file(path: pathlib.Path) -> bool:
+def is_text_bytes(data: bytes) -> bool:
     try:
-        with open(path, "rb") as f:
-            chunk = f.read(2048)
-        # If it decodes as UTF-8, we treat it as text.
-        chunk.decode("utf-8")
+        # If the first 2 KiB decode as UTF-8, we treat it as text.
+        data[:2048].decode("utf-8")
         return True
     except Exception:
         return False
@@ -59,12 +63,17 @@ def should_skip(path: pathlib.Path, script_path: pathlib.Path, repo_root: pathli
 
     return False
 
-def repair_file(path: pathlib.Path, dry_run: bool) -> bool:
+def repair_file(path: pathlib.Path, dry_run: bool, data: bytes | None = None) -> bool:
     """
     Returns True if a change (or would-change in dry-run) occurred.
+    'data' is the file's bytes when the caller already read them.
     """
     try:
-        text = path.read_text(encoding="utf-8", errors="replace")
+        if data is None:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        else:
+            # Same as read_text(): replace undecodable bytes, universal newlines.
+            text = data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
         new_text = text
         for bad, good in REPLACEMENTS.items():
             new_text = new_text.replace(bad, good)
@@ -87,6 +96,10 @@ def main():
                         help="Path (file or directory) to exclude (relative to repo root or absolute). Can be used multiple times.")
     parser.add_argument("--exclude-glob", action="append", default=[],
                         help="Glob (relative to repo root) to exclude, e.g. 'assets/**' or '**/*.min.js'. Can be used multiple times.")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"Reader threads for read-ahead; 1 reads inline (default: {DEFAULT_JOBS})")
+    parser.add_argument("--max-inflight-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Upper bound on file bytes held by read-ahead (default: %(default)g)")
     args = parser.parse_args()
 
     script_path = pathlib.Path(__file__).resolve()
@@ -96,19 +109,23 @@ def main():
     text_candidates = 0
     changed = 0
 
-    for p in repo_root.rglob("*"):
-        if not p.is_file():
-            continue
-        scanned += 1
-
-        if should_skip(p, script_path, repo_root, args.exclude, args.exclude_glob):
-            continue
-
-        if not is_text_file(p):
+    def candidates():
+        nonlocal scanned
+        # Files stream out sorted per directory; excluded dirs are pruned, not walked.
+        for fp in walk_files(str(repo_root), skip_dir=lambda d: os.path.basename(d) in DEFAULT_EXCLUDED_DIRS):
+            scanned += 1
+            p = pathlib.Path(fp)
+            if not should_skip(p, script_path, repo_root, args.exclude, args.exclude_glob):
+                yield fp
+
+    max_bytes = int(args.max_inflight_mb * 1024 * 1024)
+    # Only the 2 KiB head of each file is read until it sniffs as text; binaries are never read in full.
+    for fp, data, err in read_ahead(candidates(), jobs=args.jobs, max_bytes=max_bytes, sniff=is_text_bytes):
+        if err is not None or data is None:
             continue
 
         text_candidates += 1
-        if repair_file(p, dry_run=args.dry_run):
+        if repair_file(pathlib.Path(fp), dry_run=args.dry_run, data=data):
             changed += 1
 
     print("\n--- Summary ---")
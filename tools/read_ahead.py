@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+read_ahead.py
+
+Streaming file enumeration and bounded read-ahead, shared by the repo-wide
+fixers in this folder.
+
+Key points:
+- walk_files() is a generator: directories are visited top-down and each
+  directory's subdirs/files are yielded in sorted order, so nothing is
+  materialized up front and output order is stable across runs.
+- read_ahead() overlaps open/read latency with the caller's work: a small thread
+  pool reads upcoming files while the caller handles the current one. Results
+  come back in input order.
+- Memory stays bounded regardless of tree size: at most 'max_pending' paths are
+  queued, and reads wait for an in-flight byte budget ('max_bytes') that is only
+  returned once the caller moves past a file. Budget is granted in input order,
+  so the file the caller is waiting on can always proceed (a single file larger
+  than the budget is read alone).
+- An optional 'sniff' callback sees only the head of each file (2 KiB by default)
+  and decides whether it is read in full, so binary assets cost one small read.
+- Standard library only.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+DEFAULT_JOBS = 8
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_SNIFF_BYTES = 2048
+
+# --------------------------- Enumeration -------------------------------------
+
+def walk_files(root: str,
+               skip_dir: Optional[Callable[[str], bool]] = None,
+               accept: Optional[Callable[[str], bool]] = None) -> Iterator[str]:
+    """Yield files under 'root', sorted per directory. 'skip_dir' prunes whole subtrees."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        if skip_dir is not None and skip_dir(dirpath):
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(d for d in dirnames if skip_dir is None or not skip_dir(os.path.join(dirpath, d)))
+        for name in sorted(filenames):
+            fp = os.path.join(dirpath, name)
+            if accept is None or accept(fp):
+                yield fp
+
+# --------------------------- Read-ahead --------------------------------------
+
+class ReadResult(NamedTuple):
+    path: str
+    data: Optional[bytes]            # None when the read failed
+    error: Optional[BaseException]
+
+class _ByteBudget:
+    """Byte allowance handed out strictly in ticket (input) order."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, limit)
+        self.used = 0
+        self.next_ticket = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def acquire(self, ticket: int, size: int) -> int:
+        size = min(max(0, size), self.limit)
+        with self.cond:
+            self.cond.wait_for(lambda: self.closed or (self.next_ticket == ticket and self.used + size <= self.limit))
+            if self.closed:
+                return 0
+            self.used += size
+            self.next_ticket += 1
+            self.cond.notify_all()
+        return size
+
+    def release(self, size: int) -> None:
+        if size:
+            with self.cond:
+                self.used -= size
+                self.cond.notify_all()
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+def _read(path: str, ticket: int, budget: _ByteBudget, sniff: Optional[Callable[[bytes], bool]] = None,
+          sniff_bytes: int = 0) -> Tuple[ReadResult, int]:
+    try:
+        size = os.stat(path).st_size
+    except OSError:
+        size = 0
+    granted: Optional[int] = None
+    try:
+        with open(path, "rb") as f:
+            head = b""
+            if sniff is not None:
+                head = f.read(sniff_bytes)
+                if not sniff(head):
+                    granted = budget.acquire(ticket, 0)
+                    return ReadResult(path, None, None), granted
+            granted = budget.acquire(ticket, size)
+            return ReadResult(path, head + f.read(), None), granted
+    except Exception as exc:
+        # Every ticket takes its turn exactly once, or later readers would wait forever.
+        if granted is None:
+            granted = budget.acquire(ticket, 0)
+        return ReadResult(path, None, exc), granted
+
+def read_ahead(paths: Iterable[str], jobs: int = DEFAULT_JOBS, max_bytes: int = DEFAULT_MAX_BYTES,
+               max_pending: int = 0, sniff: Optional[Callable[[bytes], bool]] = None,
+               sniff_bytes: int = DEFAULT_SNIFF_BYTES) -> Iterator[ReadResult]:
+    """Read 'paths' on a thread pool, yielding ReadResult in input order.
+
+    'paths' is consumed lazily; a file's bytes count against 'max_bytes' until the
+    caller asks for the next result. jobs <= 1 reads inline with no threads.
+    With 'sniff', only the first 'sniff_bytes' of each file are read up front; files
+    it rejects come back as ReadResult(path, None, None) and are never read in full.
+    """
+    budget = _ByteBudget(max_bytes)
+    if jobs <= 1:
+        for ticket, fp in enumerate(paths):
+            result, granted = _read(fp, ticket, budget, sniff, sniff_bytes)
+            try:
+                yield result
+            finally:
+                budget.release(granted)
+        return
+
+    max_pending = max_pending or jobs * 4
+    pending: Deque[Future] = deque()
+    it = iter(paths)
+    ticket = 0
+    pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="read_ahead")
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                fp = next(it, None)
+                if fp is None:
+                    exhausted = True
+                    break
+                pending.append(pool.submit(_read, fp, ticket, budget, sniff, sniff_bytes))
+                ticket += 1
+            if not pending:
+                return
+            result, granted = pending.popleft().result()
+            try:
+                yield result
+            finally:
+                budget.release(granted)
+    finally:
+        # Early exit (break/exception in the caller): unblock waiting readers.
+        budget.close()
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=True)
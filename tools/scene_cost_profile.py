@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+scene_cost_profile.py
+
+Per-scene instancing cost profiler for pooled and spawned .tscn scenes.
+
+Key points:
+- Parses every .tscn under the project and computes what one instantiate() builds:
+  nodes, attached scripts, collision shapes, physics bodies/areas, scene-file
+  [connection]s, '.connect(' calls in attached scripts, sub/ext resources.
+- Nested 'instance=ExtResource(...)' scenes are expanded recursively into the totals.
+- Finds spawn sites in .gd files ('X.instantiate()' where X was (pre)loaded from a
+  .tscn), whether they sit behind a pool (pop_back/append reuse), and pool sizes.
+- Estimates peak live instances per wave from the game's caps (enemy hard cap scaled
+  by wave/difficulty, projectile overload soft cap, weapon slots, boss waves) and
+  ranks scenes by (peak instances x per-instance cost) for each wave.
+- Output is JSON (stdout or --out) tagged with the current git commit for trend tracking.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_source import CONST_NUM, DEFAULT_EXCLUDES, DIFFICULTIES, gd_round, git_head  # noqa: E402
+from read_ahead import walk_files  # noqa: E402
+from tscn_format import (  # noqa: E402
+    find_project_root,
+    fs_to_res,
+    load_text_resource,
+    res_to_fs,
+)
+
+# --------------------------- Cost model --------------------------------------
+
+# Relative weight of each thing instantiate() has to build. Nodes are the unit;
+# scripts pay for instance creation + _ready(), physics objects register with the
+# physics server, connections allocate Callables.
+COST_WEIGHTS: Dict[str, float] = {
+    "nodes": 1.0,
+    "scripts": 4.0,
+    "collision_shapes": 3.0,
+    "physics_objects": 3.0,
+    "connections": 0.5,
+    "script_connects": 0.5,
+    "sub_resources": 1.0,
+}
+
+COLLISION_TYPES: Tuple[str, ...] = (
+    "CollisionShape2D", "CollisionPolygon2D", "CollisionShape3D", "CollisionPolygon3D",
+)
+PHYSICS_TYPES: Tuple[str, ...] = (
+    "Area2D", "StaticBody2D", "CharacterBody2D", "RigidBody2D", "AnimatableBody2D",
+    "Area3D", "StaticBody3D", "CharacterBody3D", "RigidBody3D", "AnimatableBody3D",
+)
+
+# Cap consts and the script that declares them (project-relative). The wave/difficulty
+# cap formulas and boss cadence live in CAP_SCRIPT.
+CAP_SCRIPT = "scripts/main.gd"
+CAP_CONSTS: Dict[str, str] = {
+    "MAX_ENEMIES": CAP_SCRIPT,
+    "MAX_WEAPON_SLOTS": "scripts/player.gd",
+}
+
+# --------------------------- Patterns ----------------------------------------
+
+SCENE_VAR = re.compile(
+    r"""^\s*(?:@\w+(?:\([^)]*\))?\s+)*(?:var|const)\s+(?P<name>\w+)\s*(?::\s*[\w.]+\s*)?:?=\s*"""
+    r"""(?P<kind>preload|load)\(\s*"(?P<path>res://[^"]+\.tscn)"\s*\)"""
+)
+INSTANTIATE = re.compile(r"\b(?P<name>\w+)\.instantiate\(")
+FUNC_LINE = re.compile(r"^\s*(?:static\s+)?func\s+(?P<name>\w+)")
+POOL_REUSE = re.compile(r"\.pop_back\(\)")
+POOL_SIZE = re.compile(r"^\s*(?:const|var)\s+(?P<name>\w*POOL\w*SIZE\w*|\w*PREWARM\w*)\s*(?::\s*int)?\s*:?=\s*(?P<value>\d+)",
+                       re.IGNORECASE)
+PROJECTILE_SOFT_CAP = re.compile(r"var\s+soft_cap\s*:\s*int\s*=\s*(?P<value>\d+)")
+CAP_SCALE = re.compile(
+    r"func\s+_cap_scale_for_wave\([^)]*\)[^:]*:\s*(?:#[^\n]*\n|\s)*return\s+min\(\s*(?P<max>[\d.]+)\s*,\s*"
+    r"(?P<base>[\d.]+)\s*\+\s*(?P<step>[\d.]+)\s*\*"
+)
+DIFFICULTY_CASE = re.compile(r'"(?P<name>\w+)"\s*:\s*\n\s*return\s*\{[^}]*"cap_mult"\s*:\s*(?P<cap>[\d.]+)')
+DIFFICULTY_DEFAULT = re.compile(r'_\s*:\s*\n\s*return\s*\{[^}]*"cap_mult"\s*:\s*(?P<cap>[\d.]+)')
+BOSS_EVERY = re.compile(r"wave\s*%\s*(?P<n>\d+)\s*==\s*0\s*:\s*\n\s*_spawn_boss")
+
+# --------------------------- Data --------------------------------------------
+
+@dataclass
+class SceneMetrics:
+    path: str
+    nodes: int = 0
+    scripts: int = 0
+    collision_shapes: int = 0
+    physics_objects: int = 0
+    connections: int = 0
+    script_connects: int = 0
+    sub_resources: int = 0
+    ext_resources: int = 0
+    instanced_scenes: List[str] = field(default_factory=list)
+    cost: float = 0.0
+
+@dataclass
+class SpawnSite:
+    scene: str
+    file: str
+    line: int
+    func: str
+    load_kind: str
+    pooled: bool
+    pool_size: Optional[int] = None
+
+# --------------------------- Scene metrics -----------------------------------
+
+def _count_script_connects(script_fs: str) -> int:
+    try:
+        with open(script_fs, "r", encoding="utf-8", errors="replace") as f:
+            return f.read().count(".connect(")
+    except Exception:
+        return 0
+
+def _own_metrics(scene_fs: str, project_root: str) -> Tuple[SceneMetrics, List[str]]:
+    res = load_text_resource(scene_fs)
+    m = SceneMetrics(path=fs_to_res(scene_fs, project_root))
+    ext = res.ext_resources()
+    m.ext_resources = len(ext)
+    m.sub_resources = len(res.by_tag("sub_resource"))
+    m.connections = len(res.by_tag("connection"))
+    children: List[str] = []
+
+    for node in res.by_tag("node"):
+        inst = node.attrs.get("instance")
+        if inst is not None:
+            ext_id = inst.split("(", 1)[-1].rstrip(")").strip('"')
+            target = ext.get(ext_id)
+            if target is not None:
+                children.append(target.attr("path"))
+            continue  # the instanced scene's own nodes are counted when expanded
+        m.nodes += 1
+        ntype = node.attr("type")
+        if ntype in COLLISION_TYPES:
+            m.collision_shapes += 1
+        if ntype in PHYSICS_TYPES:
+            m.physics_objects += 1
+        script = node.prop("script")
+        if script and "ExtResource" in script:
+            ext_id = script.split("(", 1)[-1].rstrip(")").strip('"')
+            target = ext.get(ext_id)
+            m.scripts += 1
+            if target is not None:
+                m.script_connects += _count_script_connects(res_to_fs(target.attr("path"), project_root))
+    m.instanced_scenes = children
+    return m, children
+
+def _cost(m: SceneMetrics) -> float:
+    return round(sum(float(getattr(m, k)) * w for k, w in COST_WEIGHTS.items()), 2)
+
+def scene_metrics(project_root: str, scene_files: Sequence[str]) -> Dict[str, SceneMetrics]:
+    """Metrics per scene (res:// path), with nested instanced scenes folded into the totals."""
+    own: Dict[str, SceneMetrics] = {}
+    kids: Dict[str, List[str]] = {}
+    for fs in scene_files:
+        try:
+            m, children = _own_metrics(fs, project_root)
+        except Exception as exc:
+            print(f"Skipped {fs} ({exc})", file=sys.stderr)
+            continue
+        own[m.path] = m
+        kids[m.path] = children
+
+    totals: Dict[str, SceneMetrics] = {}
+
+    def expand(path: str, stack: Set[str]) -> Optional[SceneMetrics]:
+        if path in totals:
+            return totals[path]
+        base = own.get(path)
+        if base is None or path in stack:
+            return None
+        t = SceneMetrics(**asdict(base))
+        for child in kids.get(path, []):
+            sub = expand(child, stack | {path})
+            if sub is None:
+                continue
+            for key in COST_WEIGHTS:
+                setattr(t, key, getattr(t, key) + getattr(sub, key))
+            t.ext_resources += sub.ext_resources
+        t.cost = _cost(t)
+        totals[path] = t
+        return t
+
+    for path in own:
+        expand(path, set())
+    return totals
+
+# --------------------------- Script scanning ---------------------------------
+
+def spawn_sites(project_root: str, gd_files: Sequence[str]) -> List[SpawnSite]:
+    sites: List[SpawnSite] = []
+    for fp in gd_files:
+        try:
+            with open(fp, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except Exception:
+            continue
+        if ".instantiate(" not in text:
+            continue
+        lines = text.splitlines()
+        scene_vars: Dict[str, Tuple[str, str]] = {}
+        pool_size: Optional[int] = None
+        for ln in lines:
+            m = SCENE_VAR.match(ln)
+            if m:
+                scene_vars[m.group("name")] = (m.group("path"), m.group("kind"))
+            p = POOL_SIZE.match(ln)
+            if p:
+                pool_size = int(p.group("value"))
+        pooled_file = POOL_REUSE.search(text) is not None
+
+        func = ""
+        func_body: List[str] = []
+        pending: List[Tuple[int, str]] = []
+
+        def flush() -> None:
+            body = "\n".join(func_body)
+            reuse = POOL_REUSE.search(body) is not None
+            for lineno, name in pending:
+                path, kind = scene_vars[name]
+                sites.append(SpawnSite(
+                    scene=path, file=fs_to_res(fp, project_root), line=lineno, func=func,
+                    load_kind=kind, pooled=reuse and pooled_file, pool_size=pool_size))
+
+        for idx, ln in enumerate(lines, start=1):
+            fm = FUNC_LINE.match(ln)
+            if fm:
+                flush()
+                func, func_body, pending = fm.group("name"), [], []
+            func_body.append(ln)
+            for im in INSTANTIATE.finditer(ln):
+                if im.group("name") in scene_vars:
+                    pending.append((idx, im.group("name")))
+        flush()
+    return sites
+
+def extract_caps(root: str, gd_texts: Dict[str, str]) -> Dict[str, float]:
+    """Spawn-cap consts and formula parameters, each read from the script that owns it."""
+    by_rel = {os.path.relpath(fp, root).replace(os.sep, "/"): text for fp, text in gd_texts.items()}
+    caps: Dict[str, float] = {}
+    for name, script in CAP_CONSTS.items():
+        for ln in by_rel.get(script, "").splitlines():
+            m = CONST_NUM.match(ln)
+            if m and m.group("name") == name:
+                caps[name] = float(m.group("value"))
+                break
+    main = by_rel.get(CAP_SCRIPT, "")
+    m = CAP_SCALE.search(main)
+    if m:
+        caps["cap_scale_max"] = float(m.group("max"))
+        caps["cap_scale_base"] = float(m.group("base"))
+        caps["cap_scale_step"] = float(m.group("step"))
+    for dm in DIFFICULTY_CASE.finditer(main):
+        caps[f"cap_mult_{dm.group('name')}"] = float(dm.group("cap"))
+    dm = DIFFICULTY_DEFAULT.search(main)
+    if dm:
+        caps.setdefault("cap_mult_Normal", float(dm.group("cap")))
+    bm = BOSS_EVERY.search(main)
+    if bm:
+        caps["BOSS_EVERY"] = float(bm.group("n"))
+    # Every projectile spawner applies its own overload cap; the largest one bounds the total.
+    for text in by_rel.values():
+        pm = PROJECTILE_SOFT_CAP.search(text)
+        if pm and "get_nodes_in_group(\"projectiles\")" in text:
+            caps["PROJECTILE_SOFT_CAP"] = max(caps.get("PROJECTILE_SOFT_CAP", 0.0), float(pm.group("value")))
+    return caps
+
+# --------------------------- Per-wave model ----------------------------------
+
+def peak_instances(scene: str, wave: int, difficulty: str, caps: Dict[str, float],
+                   overrides: Dict[str, int], sites: Sequence[SpawnSite]) -> int:
+    """Estimated peak live instances of 'scene' during 'wave'."""
+    name = os.path.splitext(os.path.basename(scene))[0]
+    if name in overrides:
+        return overrides[name]
+    pool_sizes = [s.pool_size for s in sites if s.scene == scene and s.pool_size]
+    if pool_sizes:
+        return max(pool_sizes)
+    if name == "Enemy" and "MAX_ENEMIES" in caps:
+        scale = min(caps.get("cap_scale_max", 5.0),
+                    caps.get("cap_scale_base", 1.0) + caps.get("cap_scale_step", 0.18) * float(max(0, wave - 1)))
+        cap_mult = caps.get(f"cap_mult_{difficulty}", 1.0)
+        return gd_round(caps["MAX_ENEMIES"] * cap_mult * scale)
+    if name == "Bullet" and "PROJECTILE_SOFT_CAP" in caps:
+        return int(caps["PROJECTILE_SOFT_CAP"])
+    if name == "Beam" and "MAX_WEAPON_SLOTS" in caps:
+        return int(caps["MAX_WEAPON_SLOTS"])
+    if name == "Boss":
+        every = int(caps.get("BOSS_EVERY", 5))
+        return 1 if every > 0 and wave % every == 0 else 0
+    return 1
+
+def wave_rankings(metrics: Dict[str, SceneMetrics], sites: Sequence[SpawnSite], caps: Dict[str, float],
+                  waves: int, difficulty: str, overrides: Dict[str, int], top: int) -> List[dict]:
+    spawned = sorted({s.scene for s in sites if s.scene in metrics})
+    out: List[dict] = []
+    for w in range(1, waves + 1):
+        rows = []
+        for scene in spawned:
+            peak = peak_instances(scene, w, difficulty, caps, overrides, sites)
+            cost = metrics[scene].cost
+            rows.append({
+                "scene": scene,
+                "peak_instances": peak,
+                "cost_per_instance": cost,
+                "total_cost": round(cost * peak, 2),
+                "nodes_live": metrics[scene].nodes * peak,
+            })
+        rows.sort(key=lambda r: (-r["total_cost"], r["scene"]))
+        out.append({"wave": w, "ranking": rows[:top] if top > 0 else rows})
+    return out
+
+# --------------------------- IO helpers --------------------------------------
+
+def _parse_overrides(items: Sequence[str]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if not value.strip().isdigit():
+            raise SystemExit(f"--peak expects NAME=COUNT, got: {item}")
+        out[os.path.splitext(os.path.basename(name.strip()))[0]] = int(value)
+    return out
+
+# --------------------------- CLI --------------------------------------------
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description="Rank .tscn scenes by instancing cost per wave (JSON report)")
+    ap.add_argument("path", nargs="?", default=".", help="Project root or any dir inside it (default: .)")
+    ap.add_argument("--waves", type=int, default=20, help="Number of waves to model (default: 20)")
+    ap.add_argument("--difficulty", choices=DIFFICULTIES, default="Normal",
+                    help="Difficulty whose cap multiplier applies (default: Normal)")
+    ap.add_argument("--top", type=int, default=0, help="Keep only the N most expensive scenes per wave (0 = all)")
+    ap.add_argument("--peak", action="append", default=[],
+                    help="Override peak live instances, e.g. --peak Turret=12 (repeatable)")
+    ap.add_argument("--exclude", action="append", default=list(DEFAULT_EXCLUDES),
+                    help="Dir substrings to skip (repeatable)")
+    ap.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.path):
+        print(f"Not a directory: {args.path}", file=sys.stderr)
+        return 2
+    root = find_project_root(args.path)
+    overrides = _parse_overrides(args.peak)
+
+    files = list(walk_files(root,
+                            skip_dir=lambda d: any(ex in d.replace("\\", "/") + "/" for ex in args.exclude),
+                            accept=lambda f: f.endswith((".tscn", ".gd"))))
+    scenes = [fp for fp in files if fp.endswith(".tscn")]
+    scripts = [fp for fp in files if fp.endswith(".gd")]
+    texts: Dict[str, str] = {}
+    for fp in scripts:
+        try:
+            with open(fp, "r", encoding="utf-8", errors="replace") as f:
+                texts[fp] = f.read()
+        except Exception:
+            continue
+
+    metrics = scene_metrics(root, scenes)
+    sites = spawn_sites(root, scripts)
+    caps = extract_caps(root, texts)
+
+    report = {
+        "commit": git_head(root),
+        "difficulty": args.difficulty,
+        "cost_weights": COST_WEIGHTS,
+        "caps": caps,
+        "scenes": {p: asdict(m) for p, m in sorted(metrics.items())},
+        "spawn_sites": [asdict(s) for s in sites],
+        "waves": wave_rankings(metrics, sites, caps, args.waves, args.difficulty, overrides, args.top),
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.out} ({len(metrics)} scenes, {len(sites)} spawn sites, {args.waves} waves)")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+scene_minify.py
+
+Canonicalizing minifier for Godot text scenes/resources (.tscn / .tres).
+
+Key points:
+- Drops properties that equal the engine default, for built-in node/resource types
+  only (instanced and scripted nodes are left alone: their defaults are not the
+  engine's). Layout properties (anchors/offsets/grow) are never touched because
+  their setters interact with anchors_preset/layout_mode.
+- Merges identical sub_resources (same type + properties) into one shared instance,
+  drops unreferenced ones, and merges duplicate ext_resources (same path).
+- Canonical layout: ext_resources sorted by (type, path) and renumbered; sub_resources
+  renumbered in dependency/first-use order; heading attributes in a fixed order;
+  whitespace in values collapsed outside strings; 'load_steps' dropped (Godot 4.4+
+  ignores it). Semantically equal inputs therefore produce byte-identical output.
+- Incremental: a content-hash cache (default .godot/scene_minify_cache.json) skips
+  files already known to be canonical.
+- Default is a dry-run report; --write applies; --check exits 1 if anything would change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_source import DEFAULT_EXCLUDES  # noqa: E402
+from read_ahead import walk_files  # noqa: E402
+from tscn_format import (  # noqa: E402
+    RESOURCE_REF,
+    Section,
+    TextResource,
+    find_project_root,
+    parse_text_resource,
+)
+
+# Bump when the canonical form changes so stale cache entries are ignored.
+TOOL_VERSION = 1
+
+DEFAULT_CACHE = os.path.join(".godot", "scene_minify_cache.json")
+
+# --------------------------- Engine defaults ---------------------------------
+
+CLASS_PARENTS: Dict[str, str] = {
+    "CanvasItem": "Node", "Node2D": "CanvasItem", "Control": "CanvasItem",
+    "CanvasLayer": "Node", "Timer": "Node",
+    "CollisionObject2D": "Node2D", "Area2D": "CollisionObject2D", "PhysicsBody2D": "CollisionObject2D",
+    "CharacterBody2D": "PhysicsBody2D", "StaticBody2D": "PhysicsBody2D", "RigidBody2D": "PhysicsBody2D",
+    "CollisionShape2D": "Node2D", "CollisionPolygon2D": "Node2D", "Polygon2D": "Node2D",
+    "Line2D": "Node2D", "Sprite2D": "Node2D", "Camera2D": "Node2D",
+    "Container": "Control", "BoxContainer": "Container", "HBoxContainer": "BoxContainer",
+    "VBoxContainer": "BoxContainer", "MarginContainer": "Container", "CenterContainer": "Container",
+    "GridContainer": "Container", "ScrollContainer": "Container", "PanelContainer": "Container",
+    "Panel": "Control", "Label": "Control", "RichTextLabel": "Control",
+    "BaseButton": "Control", "Button": "BaseButton", "OptionButton": "Button",
+    "Range": "Control", "ProgressBar": "Range",
+    "Shape2D": "Resource", "CircleShape2D": "Shape2D", "RectangleShape2D": "Shape2D",
+}
+
+# Values exactly as Godot writes them (after canonicalize_value).
+ENGINE_DEFAULTS: Dict[str, Dict[str, str]] = {
+    "Node": {"process_mode": "0", "process_priority": "0"},
+    "CanvasItem": {
+        "visible": "true", "modulate": "Color(1, 1, 1, 1)", "self_modulate": "Color(1, 1, 1, 1)",
+        "show_behind_parent": "false", "top_level": "false", "z_index": "0", "z_as_relative": "true",
+        "y_sort_enabled": "false",
+    },
+    "Node2D": {"position": "Vector2(0, 0)", "rotation": "0.0", "scale": "Vector2(1, 1)", "skew": "0.0"},
+    "Area2D": {"monitoring": "true", "monitorable": "true"},
+    "CollisionShape2D": {"disabled": "false", "one_way_collision": "false"},
+    "Polygon2D": {"color": "Color(1, 1, 1, 1)", "antialiased": "false"},
+    "Line2D": {"width": "10.0", "default_color": "Color(1, 1, 1, 1)"},
+    "Camera2D": {"enabled": "true", "zoom": "Vector2(1, 1)"},
+    "CanvasLayer": {"layer": "1"},
+    "Timer": {"wait_time": "1.0", "one_shot": "false", "autostart": "false"},
+    "Control": {"size_flags_horizontal": "1", "size_flags_vertical": "1",
+                "custom_minimum_size": "Vector2(0, 0)", "clip_contents": "false"},
+    "Label": {"text": '""', "horizontal_alignment": "0", "vertical_alignment": "0",
+              "autowrap_mode": "0", "uppercase": "false"},
+    "BaseButton": {"disabled": "false", "toggle_mode": "false"},
+    "Button": {"text": '""', "flat": "false"},
+    "BoxContainer": {"alignment": "0"},
+    "GridContainer": {"columns": "1"},
+    "Range": {"min_value": "0.0", "max_value": "100.0", "value": "0.0"},
+    "ProgressBar": {"show_percentage": "true"},
+    "ScrollContainer": {"follow_focus": "false", "horizontal_scroll_mode": "1", "vertical_scroll_mode": "1"},
+    "CircleShape2D": {"radius": "10.0"},
+    "RectangleShape2D": {"size": "Vector2(20, 20)"},
+}
+
+# Canonical heading attribute order per section tag; unknown keys follow, sorted.
+ATTR_ORDER: Dict[str, Tuple[str, ...]] = {
+    "gd_scene": ("format", "uid"),
+    "gd_resource": ("type", "script_class", "format", "uid"),
+    "ext_resource": ("type", "uid", "path", "id"),
+    "sub_resource": ("type", "id"),
+    "node": ("name", "type", "parent", "instance", "instance_placeholder", "owner", "index", "groups", "unique_id"),
+    "connection": ("signal", "from", "to", "method", "flags", "binds", "unbinds"),
+}
+DROPPED_HEADER_ATTRS: Tuple[str, ...] = ("load_steps",)
+
+# --------------------------- Data --------------------------------------------
+
+@dataclass
+class MinifyStats:
+    path: str
+    bytes_before: int = 0
+    bytes_after: int = 0
+    defaults_removed: int = 0
+    subresources_merged: int = 0
+    subresources_dropped: int = 0
+    extresources_merged: int = 0
+    cached: bool = False
+    changed: bool = False
+
+# --------------------------- Value canonicalization --------------------------
+
+def canonicalize_value(raw: str) -> str:
+    """Collapse whitespace outside strings: 'Foo(\\n  1,2 )' -> 'Foo(1, 2)'. String bodies are untouched."""
+    out: List[str] = []
+    pending_space = False
+    in_str = False
+    i = 0
+    raw = raw.strip()
+    while i < len(raw):
+        c = raw[i]
+        if in_str:
+            out.append(c)
+            if c == "\\" and i + 1 < len(raw):
+                out.append(raw[i + 1])
+                i += 2
+                continue
+            if c == '"':
+                in_str = False
+            i += 1
+            continue
+        if c.isspace():
+            pending_space = True
+            i += 1
+            continue
+        prev = out[-1] if out else ""
+        if pending_space and prev and prev not in "([{" and c not in ")]},:":
+            out.append(" ")
+        pending_space = False
+        out.append(c)
+        if c in ",:":
+            pending_space = True
+        if c == '"':
+            in_str = True
+        i += 1
+    return "".join(out)
+
+_STRING_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+def _ref_matches(raw: str) -> List["re.Match[str]"]:
+    """ExtResource/SubResource refs that start outside string literals."""
+    spans = [m.span() for m in _STRING_LITERAL.finditer(raw)]
+    out = []
+    for m in RESOURCE_REF.finditer(raw):
+        if not any(a <= m.start() < b for a, b in spans):
+            out.append(m)
+    return out
+
+def _map_refs(raw: str, ext_map: Dict[str, str], sub_map: Dict[str, str]) -> str:
+    """Rewrite ExtResource/SubResource ids outside string literals."""
+    pieces: List[str] = []
+    last = 0
+    for m in _ref_matches(raw):
+        table = ext_map if m.group("kind") == "ExtResource" else sub_map
+        new_id = table.get(m.group("id"), m.group("id"))
+        pieces.append(raw[last:m.start()])
+        pieces.append(f'{m.group("kind")}("{new_id}")')
+        last = m.end()
+    pieces.append(raw[last:])
+    return "".join(pieces)
+
+def _refs(raw: str, kind: str) -> List[str]:
+    return [m.group("id") for m in _ref_matches(raw) if m.group("kind") == kind]
+
+def _section_values(sec: Section) -> Iterable[str]:
+    yield from sec.attrs.values()
+    for _, v in sec.props:
+        yield v
+
+# --------------------------- Transform ---------------------------------------
+
+def _defaults_for(type_name: str) -> Dict[str, str]:
+    merged: Dict[str, str] = {}
+    chain: List[str] = []
+    cur: Optional[str] = type_name
+    while cur and cur not in chain:
+        chain.append(cur)
+        cur = CLASS_PARENTS.get(cur)
+    for cls in reversed(chain):  # most-derived wins
+        merged.update(ENGINE_DEFAULTS.get(cls, {}))
+    return merged
+
+def _strip_defaults(sec: Section) -> int:
+    if sec.tag == "node":
+        if "instance" in sec.attrs or "type" not in sec.attrs or sec.prop("script") is not None:
+            return 0
+        type_name = sec.attr("type")
+    elif sec.tag == "sub_resource":
+        if sec.prop("script") is not None:
+            return 0
+        type_name = sec.attr("type")
+    else:
+        return 0
+    if type_name not in CLASS_PARENTS:
+        return 0
+    defaults = _defaults_for(type_name)
+    kept = [(k, v) for k, v in sec.props if defaults.get(k) != v]
+    removed = len(sec.props) - len(kept)
+    sec.props = kept
+    return removed
+
+def minify(res: TextResource, merge: bool = True, strip_unique_ids: bool = False) -> Tuple[str, MinifyStats]:
+    stats = MinifyStats(path=res.path)
+    for sec in res.sections:
+        sec.props = [(k, canonicalize_value(v)) for k, v in sec.props]
+        sec.attrs = {k: canonicalize_value(v) for k, v in sec.attrs.items()}
+        if strip_unique_ids:
+            sec.attrs.pop("unique_id", None)
+
+    exts = [s for s in res.sections if s.tag == "ext_resource"]
+    subs = [s for s in res.sections if s.tag == "sub_resource"]
+    rest = [s for s in res.sections if s.tag not in ("ext_resource", "sub_resource")]
+
+    for sec in subs + rest:
+        stats.defaults_removed += _strip_defaults(sec)
+
+    # ext_resources: merge same path, sort by (type, path), renumber.
+    by_path: Dict[Tuple[str, str], Section] = {}
+    ext_alias: Dict[str, Section] = {}
+    for s in exts:
+        key = (s.attr("type"), s.attr("path"))
+        if key in by_path:
+            stats.extresources_merged += 1
+        else:
+            by_path[key] = s
+        ext_alias[s.attr("id")] = by_path[key]
+    ordered_exts = [by_path[k] for k in sorted(by_path)]
+    new_ext_id = {id(s): str(i) for i, s in enumerate(ordered_exts, start=1)}
+    ext_map = {old: new_ext_id[id(s)] for old, s in ext_alias.items()}
+
+    # sub_resources: merge identical definitions until stable (children first).
+    sub_by_id: Dict[str, Section] = {s.attr("id"): s for s in subs}
+    sub_alias: Dict[str, str] = {k: k for k in sub_by_id}
+    if merge:
+        while True:
+            seen: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], str] = {}
+            merged_any = False
+            for sid, s in sub_by_id.items():
+                if sub_alias[sid] != sid:
+                    continue
+                # Same id mapping as the rewrite below, so duplicate ext_resources compare equal.
+                body = tuple((k, _map_refs(v, ext_map, sub_alias)) for k, v in s.props)
+                key = (s.attr("type"), body)
+                if key in seen:
+                    for a, target in sub_alias.items():
+                        if target == sid:
+                            sub_alias[a] = seen[key]
+                    stats.subresources_merged += 1
+                    merged_any = True
+                else:
+                    seen[key] = sid
+            if not merged_any:
+                break
+
+    # Order surviving sub_resources by first use (dependencies first); drop the unreferenced.
+    order: List[str] = []
+    visiting: Set[str] = set()
+
+    def visit(sid: str) -> None:
+        sid = sub_alias.get(sid, sid)
+        if sid in order or sid in visiting or sid not in sub_by_id:
+            return
+        visiting.add(sid)
+        for _, v in sub_by_id[sid].props:
+            for child in _refs(v, "SubResource"):
+                visit(child)
+        visiting.discard(sid)
+        order.append(sid)
+
+    for sec in rest:
+        for v in _section_values(sec):
+            for sid in _refs(v, "SubResource"):
+                visit(sid)
+    canonical_ids = {sid for sid, target in sub_alias.items() if target == sid}
+    stats.subresources_dropped = len(canonical_ids - set(order))
+    new_sub_id = {sid: str(i) for i, sid in enumerate(order, start=1)}
+    sub_map = {old: new_sub_id[target] for old, target in sub_alias.items() if target in new_sub_id}
+
+    out_subs: List[Section] = []
+    for sid in order:
+        s = sub_by_id[sid]
+        s.attrs["id"] = f'"{new_sub_id[sid]}"'
+        out_subs.append(s)
+    for s in ordered_exts:
+        s.attrs["id"] = f'"{new_ext_id[id(s)]}"'
+
+    for sec in out_subs + rest:
+        sec.props = [(k, _map_refs(v, ext_map, sub_map)) for k, v in sec.props]
+        sec.attrs = {k: _map_refs(v, ext_map, sub_map) for k, v in sec.attrs.items()}
+
+    text = serialize(res.header, ordered_exts, out_subs, rest)
+    return text, stats
+
+# --------------------------- Serialization -----------------------------------
+
+def _heading(sec: Section, drop: Sequence[str] = ()) -> str:
+    order = ATTR_ORDER.get(sec.tag, ())
+    keys = [k for k in order if k in sec.attrs]
+    keys += sorted(k for k in sec.attrs if k not in order)
+    attrs = " ".join(f"{k}={sec.attrs[k]}" for k in keys if k not in drop)
+    return f"[{sec.tag} {attrs}]" if attrs else f"[{sec.tag}]"
+
+def serialize(header: Section, exts: Sequence[Section], subs: Sequence[Section], rest: Sequence[Section]) -> str:
+    header.attrs = {k: canonicalize_value(v) for k, v in header.attrs.items()}
+    blocks: List[str] = [_heading(header, DROPPED_HEADER_ATTRS)]
+    if exts:
+        blocks.append("\n".join(_heading(s) for s in exts))
+    for sec in list(subs) + list(rest):
+        lines = [_heading(sec)]
+        lines.extend(f"{k} = {v}" for k, v in sec.props)
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+# --------------------------- Cache -------------------------------------------
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def load_cache(path: Optional[str]) -> Set[str]:
+    if not path:
+        return set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return set()
+    if data.get("version") != TOOL_VERSION:
+        return set()
+    return set(data.get("clean", []))
+
+def save_cache(path: Optional[str], clean: Set[str]) -> None:
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": TOOL_VERSION, "clean": sorted(clean)}, f, indent=0)
+            f.write("\n")
+    except Exception as exc:
+        print(f"Could not write cache {path}: {exc}", file=sys.stderr)
+
+# --------------------------- Driver ------------------------------------------
+
+def collect_resource_files(root: str, excludes: Sequence[str]) -> List[str]:
+    return list(walk_files(root,
+                           skip_dir=lambda d: any(ex in d.replace("\\", "/") + "/" for ex in excludes),
+                           accept=lambda f: f.endswith((".tscn", ".tres"))))
+
+def process_file(fp: str, known: Set[str], clean: Set[str], write: bool, merge: bool,
+                 strip_unique_ids: bool) -> MinifyStats:
+    """Minify one file. 'known' is the loaded cache; digests of files that are clean
+    after this run go into 'clean', which is what gets saved."""
+    with open(fp, "rb") as f:
+        raw = f.read()
+    # Options are part of the key: a file canonical under --no-merge may not be otherwise.
+    salt = f"v{TOOL_VERSION}:{int(merge)}{int(strip_unique_ids)}:".encode("ascii")
+    digest = _sha(salt + raw)
+    if digest in known:
+        clean.add(digest)
+        return MinifyStats(path=fp, bytes_before=len(raw), bytes_after=len(raw), cached=True)
+    res = parse_text_resource(raw.decode("utf-8", errors="replace"), fp)
+    text, stats = minify(res, merge=merge, strip_unique_ids=strip_unique_ids)
+    out = text.encode("utf-8")
+    stats.bytes_before = len(raw)
+    stats.bytes_after = len(out)
+    stats.changed = out != raw
+    if not stats.changed:
+        clean.add(digest)
+    elif write:
+        with open(fp, "wb") as f:
+            f.write(out)
+        clean.add(_sha(salt + out))
+    return stats
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description="Minify and canonicalize Godot .tscn/.tres files")
+    ap.add_argument("paths", nargs="*", default=["."], help="Files or directories (default: .)")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--write", action="store_true", help="Rewrite files in place")
+    mode.add_argument("--check", action="store_true", help="Exit 1 if any file is not canonical")
+    ap.add_argument("--no-merge", action="store_true", help="Keep identical sub_resources separate")
+    ap.add_argument("--strip-unique-ids", action="store_true",
+                    help="Also drop node unique_id attributes (loses rename tracking in inherited scenes)")
+    ap.add_argument("--cache", default=None,
+                    help=f"Hash cache file (default: <project>/{DEFAULT_CACHE})")
+    ap.add_argument("--no-cache", action="store_true", help="Ignore and do not update the hash cache")
+    ap.add_argument("--exclude", action="append", default=list(DEFAULT_EXCLUDES),
+                    help="Dir substrings to skip (repeatable)")
+    ap.add_argument("--json", action="store_true", help="Emit the per-file report as JSON")
+    args = ap.parse_args(argv)
+
+    files: List[str] = []
+    for p in args.paths:
+        if os.path.isdir(p):
+            files.extend(collect_resource_files(p, args.exclude))
+        elif os.path.isfile(p):
+            files.append(p)
+        else:
+            print(f"Not found: {p}", file=sys.stderr)
+            return 2
+
+    cache_path: Optional[str] = None
+    if not args.no_cache:
+        root = find_project_root(args.paths[0])
+        cache_path = args.cache or os.path.join(root, DEFAULT_CACHE)
+    known = load_cache(cache_path)
+    # Rebuilt from this run's files so digests of edited or deleted scenes fall out.
+    clean: Set[str] = set()
+
+    results: List[MinifyStats] = []
+    for fp in files:
+        try:
+            results.append(process_file(fp, known, clean, args.write, not args.no_merge, args.strip_unique_ids))
+        except Exception as exc:
+            print(f"Skipped {fp} ({exc})", file=sys.stderr)
+
+    save_cache(cache_path, clean)
+
+    pending = [r for r in results if r.changed]
+    saved = sum(r.bytes_before - r.bytes_after for r in results)
+    totals = {
+        "files": len(results),
+        "cached": sum(1 for r in results if r.cached),
+        "changed": len(pending),
+        "bytes_before": sum(r.bytes_before for r in results),
+        "bytes_after": sum(r.bytes_after for r in results),
+        "bytes_saved": saved,
+        "defaults_removed": sum(r.defaults_removed for r in results),
+        "subresources_merged": sum(r.subresources_merged for r in results),
+        "subresources_dropped": sum(r.subresources_dropped for r in results),
+        "extresources_merged": sum(r.extresources_merged for r in results),
+    }
+    if args.json:
+        print(json.dumps({"totals": totals, "files": [vars(r) for r in results]}, indent=2))
+    else:
+        verb = "Minified" if args.write else "Would minify"
+        for r in pending:
+            print(f"{verb} {r.path}: {r.bytes_before} -> {r.bytes_after} bytes "
+                  f"(-{r.bytes_before - r.bytes_after}), defaults -{r.defaults_removed}, "
+                  f"sub_resources merged {r.subresources_merged} / dropped {r.subresources_dropped}, "
+                  f"ext_resources merged {r.extresources_merged}")
+        print(f"{totals['files']} file(s), {totals['cached']} cached, {totals['changed']} changed, "
+              f"{saved} bytes saved")
+
+    if args.check and pending:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+tscn_format.py
+
+Minimal reader for Godot 4 text scenes/resources (.tscn / .tres), shared by the
+scene tools in this folder.
+
+Key points:
+- Splits a file into '[heading attr=value ...]' sections, each followed by
+  'key = value' properties. Values are kept as raw text (never evaluated), so
+  multi-line arrays/dicts/strings survive untouched.
+- Helpers to unquote strings, decode ExtResource("id") / SubResource("id") refs,
+  and map 'res://' paths onto the project directory.
+- No Godot install required; standard library only.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# --------------------------- Patterns ----------------------------------------
+
+HEADING = re.compile(r"^\[(?P<tag>[A-Za-z_]\w*)(?P<attrs>.*)\]\s*$")
+
+# attr=value where value is a quoted string, [array], Call("args") or a bare token.
+HEADING_ATTR = re.compile(
+    r"""(?P<key>[A-Za-z_]\w*)=(?P<value>"(?:[^"\\]|\\.)*"|\[[^\]]*\]|\w+\([^)]*\)|[^\s\]]+)"""
+)
+
+PROPERTY = re.compile(r"^(?P<key>[^\s=][^=]*?)\s*=\s*(?P<value>.*)$")
+
+RESOURCE_REF = re.compile(r"""(?P<kind>ExtResource|SubResource)\(\s*"?(?P<id>[^")\s]+)"?\s*\)""")
+
+# --------------------------- Data --------------------------------------------
+
+@dataclass
+class Section:
+    tag: str
+    attrs: Dict[str, str] = field(default_factory=dict)     # raw attribute text, in file order
+    props: List[Tuple[str, str]] = field(default_factory=list)  # (key, raw value), in file order
+    line: int = 0
+
+    def attr(self, key: str, default: str = "") -> str:
+        raw = self.attrs.get(key)
+        return unquote(raw) if raw is not None else default
+
+    def prop(self, key: str) -> Optional[str]:
+        for k, v in self.props:
+            if k == key:
+                return v
+        return None
+
+@dataclass
+class TextResource:
+    path: str
+    header: Section
+    sections: List[Section]
+
+    def by_tag(self, tag: str) -> List[Section]:
+        return [s for s in self.sections if s.tag == tag]
+
+    def ext_resources(self) -> Dict[str, Section]:
+        return {s.attr("id"): s for s in self.by_tag("ext_resource")}
+
+    def sub_resources(self) -> Dict[str, Section]:
+        return {s.attr("id"): s for s in self.by_tag("sub_resource")}
+
+# --------------------------- Helpers -----------------------------------------
+
+def unquote(raw: str) -> str:
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return raw[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return raw
+
+def resource_refs(raw: str) -> List[Tuple[str, str]]:
+    """All (kind, id) references in a raw value, e.g. [('ExtResource', '1')]."""
+    return [(m.group("kind"), m.group("id")) for m in RESOURCE_REF.finditer(raw)]
+
+def _value_open(raw: str) -> bool:
+    """True while a raw value still has an unterminated string or bracket."""
+    depth = 0
+    in_str = False
+    i = 0
+    while i < len(raw):
+        c = raw[i]
+        if in_str:
+            if c == "\\":
+                i += 2
+                continue
+            if c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        i += 1
+    return in_str or depth > 0
+
+def find_project_root(start: str) -> str:
+    """Nearest directory at or above 'start' holding project.godot (or 'start' itself)."""
+    cur = os.path.abspath(start if os.path.isdir(start) else os.path.dirname(start))
+    while True:
+        if os.path.isfile(os.path.join(cur, "project.godot")):
+            return cur
+        parent = os.path.dirname(cur)
+        if parent == cur:
+            return os.path.abspath(start if os.path.isdir(start) else os.path.dirname(start))
+        cur = parent
+
+def res_to_fs(res_path: str, project_root: str) -> str:
+    if res_path.startswith("res://"):
+        return os.path.normpath(os.path.join(project_root, res_path[len("res://"):]))
+    return os.path.normpath(res_path)
+
+def fs_to_res(fs_path: str, project_root: str) -> str:
+    rel = os.path.relpath(os.path.abspath(fs_path), project_root).replace("\\", "/")
+    return "res://" + rel
+
+# --------------------------- Parsing -----------------------------------------
+
+def parse_heading(line: str, lineno: int = 0) -> Optional[Section]:
+    m = HEADING.match(line.strip())
+    if not m:
+        return None
+    attrs = {a.group("key"): a.group("value") for a in HEADING_ATTR.finditer(m.group("attrs"))}
+    return Section(tag=m.group("tag"), attrs=attrs, line=lineno)
+
+def parse_text_resource(text: str, path: str = "") -> TextResource:
+    if text.startswith("\ufeff"):
+        text = text[1:]
+    lines = text.splitlines()
+    header: Optional[Section] = None
+    sections: List[Section] = []
+    current: Optional[Section] = None
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        stripped = line.strip()
+        if not stripped or stripped.startswith(";"):
+            continue
+        if stripped.startswith("["):
+            sec = parse_heading(stripped, i)
+            if sec is not None:
+                if header is None and sec.tag in ("gd_scene", "gd_resource"):
+                    header = sec
+                else:
+                    sections.append(sec)
+                current = sec
+                continue
+        m = PROPERTY.match(line)
+        if not m or current is None:
+            continue
+        value = m.group("value")
+        # Multi-line values: keep consuming until brackets/strings close.
+        while _value_open(value) and i < len(lines):
+            value += "\n" + lines[i]
+            i += 1
+        current.props.append((m.group("key").strip(), value))
+
+    if header is None:
+        header = Section(tag="gd_scene")
+    return TextResource(path=path, header=header, sections=sections)
+
+def load_text_resource(path: str) -> TextResource:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return parse_text_resource(raw.decode("utf-8", errors="replace"), path)